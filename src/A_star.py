@@ -1,80 +1,87 @@
 import numpy as np
 from heapq import heappush, heappop
-from typing import List, Tuple, Optional
-
-from heapq import heappush, heappop
-from typing import List, Tuple, Optional
+from typing import List, Tuple, Optional, Union
+from time_expanded_graph import build_graph, check_cancelled
 
 def a_star_search_dynamic(
     grid: List[List[int]],
-    smoke_time: List[List[List[float]]],
+    smoke_time: Union[np.ndarray, List[List[List[float]]]],
     start: Tuple[int, int],
     w1: float = 0.6,
     w2: float = 0.3,
     w3: float = 0.1,
-    danger_threshold: float = 0.4
+    danger_threshold: float = 0.4,
+    cancel_event=None
 ) -> Optional[Tuple[float, List[Tuple[int, int, int]]]]:
     """
     A* pathfinding on a dynamic smoke-aware time-expanded graph with multiple exits.
-    Interface unified with uniform_cost_search_dynamic.
+    Interface unified with uniform_cost_search_dynamic; setting the optional
+    `cancel_event` (threading.Event) makes the search raise SearchCancelled.
     """
 
-    T = len(smoke_time)
-    rows, cols = len(grid), len(grid[0])
-    sr, sc = start
-
-    # 提取所有出口坐标
-    exits = [(r, c) for r in range(rows) for c in range(cols) if grid[r][c] == 2]
-    if not exits:
+    graph = build_graph(grid, smoke_time, start)
+    if graph is None or not graph.has_exit:
         return None
 
-    def heuristic(r: int, c: int) -> float:
-        return min(w2 * (abs(r - er) + abs(c - ec)) for er, ec in exits)
+    smoke = graph.smoke_flat
+    exit_mask = graph.exit_mask
+    neighbors = graph.neighbors
+    layer_size = graph.layer_size
+    last_layer = (graph.T - 1) * layer_size
 
-    def is_dangerous(t: int, r: int, c: int) -> bool:
-        return smoke_time[t][r][c] >= danger_threshold
+    # 启发式：按地图缓存的多出口墙体感知距离场，O(1) 查表且不低于曼哈顿距离
+    # 每一步（移动或等待）代价至少为 w2，因此 w2 * 距离 可采纳且一致
+    exit_distances = graph.exit_distances
+    heuristic_table = np.where(np.isinf(exit_distances), np.inf, w2 * exit_distances).tolist()
 
-    # 初始化起点状态
-    g0 = w1 * smoke_time[0][sr][sc] + (w3 if is_dangerous(0, sr, sc) else 0)
-    h0 = heuristic(sr, sc)
-    f0 = g0 + h0
-    open_set = [(f0, g0, (0, sr, sc))]
-    came_from = {(0, sr, sc): None}
-    cost_so_far = {(0, sr, sc): g0}
+    def step_penalty(smoke_value: float) -> float:
+        return w3 if smoke_value >= danger_threshold else 0
 
-    directions = [(-1, 0), (1, 0), (0, -1), (0, 1), (0, 0)]  # 4邻域 + 等待
+    cost_so_far = graph.cost_array()
+    came_from = graph.parent_array()
+    closed = graph.flag_array()
+
+    # 初始化起点状态
+    sr, sc = start
+    start_state = graph.encode(0, sr, sc)
+    if np.isinf(exit_distances[start_state]) and not graph.wall_mask[start_state]:
+        # 起点与所有出口不连通
+        return None
+    s0 = float(smoke[start_state])
+    g0 = w1 * s0 + step_penalty(s0)
+    f0 = g0 + heuristic_table[start_state]
+    cost_so_far[start_state] = g0
+    open_set = [(f0, g0, start_state)]
 
     while open_set:
-        f, g, (t, r, c) = heappop(open_set)
+        check_cancelled(cancel_event)
+        f, g, state = heappop(open_set)
+        if closed[state]:
+            continue
+        closed[state] = True
 
-        if grid[r][c] == 2:
+        cell = state % layer_size
+
+        if exit_mask[cell]:
             # 到达出口，回溯路径
-            path = []
-            state = (t, r, c)
-            while state is not None:
-                path.append(state)
-                state = came_from[state]
-            path.reverse()
-            return g, path
-
-        if t + 1 >= T:
+            return g, graph.reconstruct_path(came_from, state)
+
+        if state >= last_layer:
             continue
 
-        nt = t + 1
-        for dr, dc in directions:
-            nr, nc = r + dr, c + dc
-            if 0 <= nr < rows and 0 <= nc < cols and grid[nr][nc] != 1:
-                smoke = smoke_time[nt][nr][nc]
-                penalty = w3 if is_dangerous(nt, nr, nc) else 0
-                step_cost = w1 * smoke + w2 * 1 + penalty
-                g_new = g + step_cost
-                state = (nt, nr, nc)
-
-                if state not in cost_so_far or g_new < cost_so_far[state]:
-                    cost_so_far[state] = g_new
-                    came_from[state] = (t, r, c)
-                    f_new = g_new + heuristic(nr, nc)
-                    heappush(open_set, (f_new, g_new, state))
+        # 4邻域 + 等待，扩展到下一时间层
+        next_base = state - cell + layer_size
+        for ncell in neighbors[cell]:
+            nstate = next_base + ncell
+            s = float(smoke[nstate])
+            step_cost = w1 * s + w2 * 1 + step_penalty(s)
+            g_new = g + step_cost
+
+            if g_new < cost_so_far[nstate]:
+                cost_so_far[nstate] = g_new
+                came_from[nstate] = state
+                f_new = g_new + heuristic_table[ncell]
+                heappush(open_set, (f_new, g_new, nstate))
 
     return None
 
@@ -100,7 +107,7 @@ def example():
     H, W = len(grid), len(grid[0])
     smoke_time = np.random.rand(T, H, W)  # 值域在 [0,1)
 
-    result = a_star_search_dynamic(grid, smoke_time.tolist(), start)
+    result = a_star_search_dynamic(grid, smoke_time, start)
     if result is None:
         print("在给定时间内未能找到出口！")
     else:
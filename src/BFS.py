@@ -1,55 +1,64 @@
 import numpy as np
 from collections import deque
-from typing import List, Tuple, Optional
+from typing import List, Tuple, Optional, Union
+from time_expanded_graph import build_graph, check_cancelled
 
 def bfs_search_dynamic(
     grid: List[List[int]],
-    smoke_time: List[List[List[float]]],
-    start: Tuple[int, int]
+    smoke_time: Union[np.ndarray, List[List[List[float]]]],
+    start: Tuple[int, int],
+    cancel_event=None
 ) -> Optional[Tuple[float, List[Tuple[int, int, int]]]]:
     """
     BFS to find the time-optimal (fewest steps) path to any exit,
     returning total smoke cost and the path [(t, r, c), ...].
 
     :param grid: static grid (0=free, 1=wall, 2=exit, 3=start)
-    :param smoke_time: smoke concentrations over time [T][R][C]
+    :param smoke_time: smoke concentrations over time [T][R][C], ndarray or nested lists
     :param start: (row, col)
+    :param cancel_event: optional threading.Event; when set the search raises SearchCancelled
     :return: (total smoke cost, path) or None if no exit reachable
     """
-    T = len(smoke_time)
-    rows, cols = len(grid), len(grid[0])
-    sr, sc = start
-
-    exits = [(r, c) for r in range(rows) for c in range(cols) if grid[r][c] == 2]
-    if not exits:
+    graph = build_graph(grid, smoke_time, start)
+    if graph is None or not graph.has_exit:
         return None
 
-    queue = deque()
-    queue.append(((0, sr, sc), smoke_time[0][sr][sc], [(0, sr, sc)]))
-    visited = set()
-    visited.add((0, sr, sc))
+    smoke = graph.smoke_flat
+    exit_mask = graph.exit_mask
+    neighbors = graph.neighbors
+    layer_size = graph.layer_size
+    last_layer = (graph.T - 1) * layer_size
 
-    directions = [(-1, 0), (1, 0), (0, -1), (0, 1), (0, 0)]  # 4方向 + 等待
+    sr, sc = start
+    start_state = graph.encode(0, sr, sc)
+
+    # 队列只存 (状态, 累积代价)，路径通过父指针在找到出口时一次性回溯
+    came_from = graph.parent_array()
+    visited = graph.flag_array()
+    visited[start_state] = True
+    queue = deque()
+    queue.append((start_state, float(smoke[start_state])))
 
     while queue:
-        (t, r, c), current_cost, path = queue.popleft()
+        check_cancelled(cancel_event)
+        state, current_cost = queue.popleft()
 
-        if (r, c) in exits:
-            return current_cost, path
+        cell = state % layer_size
+        if exit_mask[cell]:
+            return current_cost, graph.reconstruct_path(came_from, state)
 
-        if t + 1 >= T:
+        if state >= last_layer:
             continue
 
-        for dr, dc in directions:
-            nr, nc = r + dr, c + dc
-            nt = t + 1
-            if 0 <= nr < rows and 0 <= nc < cols and grid[nr][nc] != 1:
-                state = (nt, nr, nc)
-                if state not in visited:
-                    visited.add(state)
-                    step_cost = smoke_time[nt][nr][nc]
-                    new_path = path + [state]
-                    queue.append((state, current_cost + step_cost, new_path))
+        # 4方向 + 等待，扩展到下一时间层
+        next_base = state - cell + layer_size
+        for ncell in neighbors[cell]:
+            nstate = next_base + ncell
+            if not visited[nstate]:
+                visited[nstate] = True
+                came_from[nstate] = state
+                step_cost = float(smoke[nstate])
+                queue.append((nstate, current_cost + step_cost))
 
     return None
 
@@ -76,7 +85,7 @@ def example():
     smoke_time = np.random.rand(T, H, W)  # 值域在 [0,1)
 
     # 调用 UCS 动态搜索
-    result = bfs_search_dynamic(grid, smoke_time.tolist(), start)
+    result = bfs_search_dynamic(grid, smoke_time, start)
 
     if result is None:
         print("在给定时间内未能找到出口！")
@@ -89,5 +98,53 @@ def example():
             mark = "出口" if cell_type == 2 else ("起点" if cell_type == 3 else "")
             print(f"  t={t}, pos=({r},{c}) {mark}")
 
+def benchmark_corridor(length: int = 300):
+    """
+    对比长走廊场景下父指针回溯与逐条复制路径两种做法的峰值内存。
+
+    走廊为 1 x length 的通道，起点在最左端、出口在最右端，时间层数为 length + 1。
+    """
+    import time
+    import tracemalloc
+
+    grid = [[3] + [0] * (length - 2) + [2]]
+    smoke_time = np.random.rand(length + 1, 1, length)
+    start = (0, 0)
+
+    def path_copy_bfs():
+        # 旧实现：每个队列元素都携带完整路径副本
+        T, cols = len(smoke_time), length
+        queue = deque([((0, 0, 0), smoke_time[0][0][0], [(0, 0, 0)])])
+        visited = {(0, 0, 0)}
+        while queue:
+            (t, r, c), cost, path = queue.popleft()
+            if grid[r][c] == 2:
+                return cost, path
+            if t + 1 >= T:
+                continue
+            for dc in (-1, 1, 0):
+                nc = c + dc
+                state = (t + 1, r, nc)
+                if 0 <= nc < cols and state not in visited:
+                    visited.add(state)
+                    queue.append((state, cost + smoke_time[t + 1][r][nc], path + [state]))
+        return None
+
+    for name, run in (("父指针回溯", lambda: bfs_search_dynamic(grid, smoke_time, start)),
+                      ("复制路径", path_copy_bfs)):
+        tracemalloc.start()
+        begin = time.perf_counter()
+        cost, path = run()
+        elapsed = time.perf_counter() - begin
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{name}: 路径长度 {len(path)}, 代价 {cost:.3f}, "
+              f"峰值内存 {peak / 2 ** 20:.1f} MiB, 耗时 {elapsed:.2f} s")
+
 if __name__ == "__main__":
-    example()
\ No newline at end of file
+    import sys
+
+    if "--benchmark" in sys.argv:
+        benchmark_corridor()
+    else:
+        example()
\ No newline at end of file
@@ -1,11 +1,13 @@
 import numpy as np
 import heapq
-from typing import List, Tuple, Optional
+from typing import List, Tuple, Optional, Union
+from time_expanded_graph import build_graph, check_cancelled, gather_neighbors, DIRECTIONS
 
 def uniform_cost_search_dynamic(
     grid: List[List[int]],
-    smoke_time: List[List[List[float]]],
-    start: Tuple[int, int]
+    smoke_time: Union[np.ndarray, List[List[List[float]]]],
+    start: Tuple[int, int],
+    cancel_event=None
 ) -> Optional[Tuple[float, List[Tuple[int, int, int]]]]:
     """
     Perform UCS on a time-expanded graph for dynamic smoke concentrations,
@@ -16,65 +18,151 @@ def uniform_cost_search_dynamic(
       3 = start
 
     :param grid: 2D map with codes 0/1/2/3
-    :param smoke_time: list of 2D smoke concentration grids (values in [0,1]), one per time step
+    :param smoke_time: [T, R, C] ndarray or list of 2D smoke concentration grids (values in [0,1]), one per time step; read without copying
     :param start: (row, col) of the start position
+    :param cancel_event: optional threading.Event; when set the search raises SearchCancelled
     :return: (total_smoke_cost, path list of (time, row, col)) or None if no exit reached
     """
-    T = len(smoke_time)
-    rows, cols = len(grid), len(grid[0])
-
-    # Helper: is this cell an exit (but not the start itself)?
-    def is_exit(r: int, c: int) -> bool:
-        return grid[r][c] == 2
-
-    # Priority queue of (accumulated_cost, (t, r, c))
-    open_list: List[Tuple[float, Tuple[int, int, int]]] = []
-    # Initialize with start at time 0
+    graph = build_graph(grid, smoke_time, start)
+    if graph is None:
+        return None
+
+    smoke = graph.smoke_flat
+    exit_mask = graph.exit_mask
+    neighbors = graph.neighbors
+    layer_size = graph.layer_size
+    last_layer = (graph.T - 1) * layer_size
+
+    # Records of best cost / parent / closed flag to each encoded state
+    cost_so_far = graph.cost_array()
+    came_from = graph.parent_array()
+    closed = graph.flag_array()
+
+    # Priority queue of (accumulated_cost, state); state order matches (t, r, c) order
     sr, sc = start
-    init_cost = smoke_time[0][sr][sc]
-    heapq.heappush(open_list, (init_cost, (0, sr, sc)))
-
-    # Records of best cost to each (t,r,c)
-    cost_so_far = {(0, sr, sc): init_cost}
-    came_from = {(0, sr, sc): None}
-
-    # 4‐connected moves + wait
-    directions = [(-1,0), (1,0), (0,-1), (0,1), (0,0)]
+    start_state = graph.encode(0, sr, sc)
+    init_cost = float(smoke[start_state])
+    cost_so_far[start_state] = init_cost
+    open_list: List[Tuple[float, int]] = [(init_cost, start_state)]
 
     while open_list:
-        current_cost, (t, r, c) = heapq.heappop(open_list)
+        check_cancelled(cancel_event)
+        current_cost, state = heapq.heappop(open_list)
+        if closed[state]:
+            continue
+        closed[state] = True
+
+        cell = state % layer_size
 
         # If we've reached an exit, reconstruct path
-        if is_exit(r, c):
-            path = []
-            state = (t, r, c)
-            while state is not None:
-                path.append(state)
-                state = came_from[state]
-            path.reverse()
-            return current_cost, path
+        if exit_mask[cell]:
+            return current_cost, graph.reconstruct_path(came_from, state)
 
         # If out of time steps, skip expanding
-        if t + 1 >= T:
+        if state >= last_layer:
             continue
 
-        # Expand neighbors at next time step
-        nt = t + 1
-        for dr, dc in directions:
-            nr, nc = r + dr, c + dc
-            # must be within bounds and not a wall
-            if 0 <= nr < rows and 0 <= nc < cols and grid[nr][nc] != 1:
-                step_cost = smoke_time[nt][nr][nc]
-                new_cost = current_cost + step_cost
-                state = (nt, nr, nc)
-                if state not in cost_so_far or new_cost < cost_so_far[state]:
-                    cost_so_far[state] = new_cost
-                    came_from[state] = (t, r, c)
-                    heapq.heappush(open_list, (new_cost, state))
+        # Expand neighbors (4-connected moves + wait) at next time step
+        next_base = state - cell + layer_size
+        for ncell in neighbors[cell]:
+            nstate = next_base + ncell
+            new_cost = current_cost + float(smoke[nstate])
+            if new_cost < cost_so_far[nstate]:
+                cost_so_far[nstate] = new_cost
+                came_from[nstate] = state
+                heapq.heappush(open_list, (new_cost, nstate))
 
     # No exit reached within the time horizon
     return None
 
+def layered_dp_search_dynamic(
+    grid: List[List[int]],
+    smoke_time: Union[np.ndarray, List[List[List[float]]]],
+    start: Tuple[int, int],
+    w1: float = 1.0,
+    w2: float = 0.0,
+    w3: float = 0.0,
+    danger_threshold: float = 0.4,
+    cancel_event=None
+) -> Optional[Tuple[float, List[Tuple[int, int, int]]]]:
+    """
+    Heap-free solver for the same time-expanded graph as uniform_cost_search_dynamic.
+
+    Every edge goes from layer t to layer t+1, so the graph is a DAG and the best
+    cost of all states in layer t+1 follows from layer t by a 5-neighbour
+    (4 moves + wait) min-filter plus the step cost of layer t+1. Each layer is one
+    vectorized NumPy sweep; exits are terminal and are never expanded.
+
+    The default weights give the UCS cost model (step cost = smoke). Passing the
+    A* weights gives the a_star_search_dynamic cost model
+    (step cost = w1*smoke + w2 + w3 if smoke >= danger_threshold).
+
+    :param grid: 2D map with codes 0/1/2/3
+    :param smoke_time: [T, R, C] ndarray or nested lists of smoke concentrations
+    :param start: (row, col) of the start position
+    :param cancel_event: optional threading.Event; when set the search raises SearchCancelled
+    :return: (total_cost, path list of (time, row, col)) or None if no exit reached
+    """
+    graph = build_graph(grid, smoke_time, start)
+    if graph is None or not graph.has_exit:
+        return None
+
+    T, rows, cols = graph.T, graph.rows, graph.cols
+    passable = ~graph.wall_mask.reshape(rows, cols)
+    exits = graph.exit_mask.reshape(rows, cols)
+    non_exits = ~exits
+
+    def layer_cost(t: int) -> np.ndarray:
+        return graph.step_cost_layer(t, w1, w2, w3, danger_threshold)
+
+    # 起点代价与 UCS/A* 一致：不含每步的 w2
+    sr, sc = start
+    init_cost = graph.start_cost(0, sr, sc, w1, w3, danger_threshold)
+    if exits[sr, sc]:
+        return init_cost, [(0, sr, sc)]
+
+    # 当前层最优代价；每层记录最优前驱方向（DIRECTIONS 的下标）
+    best_layer = np.full((rows, cols), np.inf)
+    best_layer[sr, sc] = init_cost
+    came_from = np.zeros((T, rows, cols), dtype=np.int8)
+    candidates = np.empty((len(DIRECTIONS), rows, cols))
+
+    best_cost, best_state = np.inf, None
+    for t in range(1, T):
+        check_cancelled(cancel_event)
+        # 出口为终止状态，不再向下一层扩展
+        frontier = np.where(exits, np.inf, best_layer)
+
+        # 方向 (dr, dc) 的前驱位于 (r - dr, c - dc)
+        gather_neighbors(frontier, candidates, sign=-1)
+
+        came_from[t] = np.argmin(candidates, axis=0)
+        reached = np.take_along_axis(candidates, came_from[t][None].astype(np.intp), axis=0)[0]
+        best_layer = np.where(passable, reached + layer_cost(t), np.inf)
+
+        # 与 UCS 相同的平局规则：代价相同取更早的时间层、再取更小的 (r, c)
+        exit_costs = np.where(exits, best_layer, np.inf)
+        cell = int(np.argmin(exit_costs))
+        if exit_costs.flat[cell] < best_cost:
+            best_cost, best_state = float(exit_costs.flat[cell]), (t, *divmod(cell, cols))
+
+        # 步长代价非负：剩余状态都不可能再得到更小的出口代价
+        remaining = best_layer[non_exits]
+        if remaining.size == 0 or remaining.min() >= best_cost:
+            break
+
+    if best_state is None:
+        return None
+
+    t, r, c = best_state
+    path = [(t, r, c)]
+    while t > 0:
+        dr, dc = DIRECTIONS[came_from[t, r, c]]
+        t, r, c = t - 1, r - dr, c - dc
+        path.append((t, r, c))
+    path.reverse()
+    return best_cost, path
+
 def example():
     # 定义地图：
     # 0 = 可通行，1 = 墙壁，2 = 出口，3 = 起点
@@ -98,7 +186,7 @@ def example():
     smoke_time = np.random.rand(T, H, W)  # 值域在 [0,1)
 
     # 调用 UCS 动态搜索
-    result = uniform_cost_search_dynamic(grid, smoke_time.tolist(), start)
+    result = uniform_cost_search_dynamic(grid, smoke_time, start)
 
     if result is None:
         print("在给定时间内未能找到出口！")
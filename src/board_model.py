@@ -0,0 +1,149 @@
+from contextlib import contextmanager
+import numpy as np
+from PyQt5 import QtCore
+from PyQt5.QtCore import pyqtSignal
+
+# 合法的格子状态：0=空地, 1=墙体, 2=出口, 3=逃生起始点
+NUM_STATES = 4
+
+
+class BoardModel(QtCore.QObject):
+    """
+    Floor plan shared by every screen: one [size, size] uint8 array.
+
+    Views (InteractiveChessboard) write through set_cell / set_cells / load and
+    repaint from cells_changed, which carries the row and column indices of the
+    changed cells. Edits inside batch() are merged into one signal.
+
+    snapshot() hands out a read-only view without copying. The model copies its
+    array before the next write (copy-on-write), so snapshots never change.
+    """
+
+    cells_changed = pyqtSignal(object, object)  # 变化格子的行下标数组, 列下标数组
+
+    def __init__(self, size=32, parent=None):
+        super().__init__(parent)
+        self.size = size
+        self._cells = np.zeros((size, size), dtype=np.uint8)
+        # 当前数组是否被快照引用；为 True 时写入前先复制
+        self._shared = False
+        # 批量修改中累积的变化格子；None 表示不在批量修改中
+        self._pending = None
+
+    @property
+    def cells(self) -> np.ndarray:
+        """Read-only view of the current cells; it follows later edits."""
+        view = self._cells.view()
+        view.flags.writeable = False
+        return view
+
+    def snapshot(self) -> np.ndarray:
+        """Read-only array of the current cells that later edits do not change."""
+        self._shared = True
+        return self.cells
+
+    def _writable(self) -> np.ndarray:
+        if self._shared:
+            self._cells = self._cells.copy()
+            self._shared = False
+        return self._cells
+
+    def state(self, row, col) -> int:
+        return int(self._cells[row, col])
+
+    def set_cell(self, row, col, state):
+        """Set one cell; no signal if the state is unchanged."""
+        if self._cells[row, col] == state:
+            return
+        self._writable()[row, col] = state
+        self._notify(np.array([row]), np.array([col]))
+
+    def set_cells(self, rows, cols, state) -> int:
+        """
+        Set many cells at once; out-of-board indices are ignored.
+
+        :param state: one state for all cells, or an array aligned with rows/cols
+        :return: number of cells that changed
+        """
+        rows = np.asarray(rows, dtype=np.intp).ravel()
+        cols = np.asarray(cols, dtype=np.intp).ravel()
+        state = np.broadcast_to(np.asarray(state, dtype=np.uint8), rows.shape)
+        inside = (rows >= 0) & (rows < self.size) & (cols >= 0) & (cols < self.size)
+        rows, cols, state = rows[inside], cols[inside], state[inside]
+
+        changed = self._cells[rows, cols] != state
+        if not changed.any():
+            return 0
+        rows, cols = rows[changed], cols[changed]
+        self._writable()[rows, cols] = state[changed]
+        self._notify(rows, cols)
+        return len(rows)
+
+    def validate(self, matrix):
+        """
+        Convert a nested list / array to a [size, size] uint8 array.
+
+        Invalid states become empty floor; returns None on a size mismatch.
+        """
+        try:
+            # 指定 dtype 可省去 NumPy 对嵌套列表逐元素推断类型
+            cells = np.asarray(matrix, dtype=np.int64)
+        except (ValueError, TypeError):
+            cells = None
+        if cells is None or cells.shape != (self.size, self.size):
+            print(f"矩阵大小不匹配: 期望 {self.size}x{self.size}")
+            return None
+
+        invalid = (cells < 0) | (cells >= NUM_STATES)
+        if invalid.any():
+            print(f"无效状态值 {np.count_nonzero(invalid)} 个，已设为空地")
+            cells = np.where(invalid, 0, cells)
+        return cells.astype(np.uint8)
+
+    def load(self, matrix) -> int:
+        """
+        Replace the whole board, touching only cells that differ.
+
+        :return: number of cells that changed (0 also for an invalid matrix)
+        """
+        if matrix is self._cells or (isinstance(matrix, np.ndarray) and matrix.base is self._cells):
+            return 0
+        cells = self.validate(matrix)
+        if cells is None:
+            return 0
+        rows, cols = np.nonzero(cells != self._cells)
+        if len(rows) == 0:
+            return 0
+        if len(rows) * 4 > cells.size:
+            # 大部分格子都变了：直接换成新数组
+            self._cells = cells
+            self._shared = False
+        else:
+            self._writable()[rows, cols] = cells[rows, cols]
+        self._notify(rows, cols)
+        return len(rows)
+
+    def clear(self):
+        rows, cols = np.nonzero(self._cells)
+        self.set_cells(rows, cols, 0)
+
+    @contextmanager
+    def batch(self):
+        """Merge all edits inside the block into one cells_changed signal. Can be nested."""
+        if self._pending is not None:
+            yield
+            return
+        self._pending = np.zeros((self.size, self.size), dtype=np.bool_)
+        try:
+            yield
+        finally:
+            pending, self._pending = self._pending, None
+            rows, cols = np.nonzero(pending)
+            if len(rows):
+                self.cells_changed.emit(rows, cols)
+
+    def _notify(self, rows, cols):
+        if self._pending is not None:
+            self._pending[rows, cols] = True
+        else:
+            self.cells_changed.emit(rows, cols)
@@ -1,8 +1,67 @@
 from PyQt5 import QtCore, QtGui, QtWidgets
-from PyQt5.QtCore import Qt, QRectF
-from PyQt5.QtGui import QBrush, QPen, QColor
-from PyQt5.QtWidgets import QGraphicsScene, QGraphicsRectItem
-import copy
+from PyQt5.QtCore import Qt, QRectF, QLineF, pyqtSignal
+from PyQt5.QtGui import QBrush, QPen, QColor, QImage
+from PyQt5.QtWidgets import QGraphicsScene, QGraphicsRectItem, QGraphicsItem, QStyleOptionGraphicsItem
+import numpy as np
+from scipy import ndimage
+from board_model import BoardModel
+
+# 边长超过该值的棋盘使用分块绘制后端，而不是每格一个图元
+TILED_THRESHOLD = 64
+# 分块边长（格）
+TILE_SIZE = 64
+# 每格至少占这么多屏幕像素时才画网格线
+GRID_MIN_PIXELS = 6
+# 缩放范围：放大到每格最多占这么多屏幕像素
+MAX_CELL_PIXELS = 48
+ZOOM_STEP = 1.25
+
+# 各状态的颜色：0=白色空地, 1=黑色墙体, 2=绿色出口, 3=粉色逃生起始点
+CELL_COLORS = np.array([
+    [255, 255, 255],
+    [0, 0, 0],
+    [0, 255, 0],
+    [255, 0, 255],
+], dtype=np.uint8)
+# 缩小时多个格子合并为一个像素，按优先级保留：出口 > 起点 > 墙体 > 空地
+LOD_PRIORITY = np.array([0, 1, 3, 2], dtype=np.uint8)
+LOD_STATE = np.argsort(LOD_PRIORITY).astype(np.uint8)
+
+# 编辑工具：画笔（逐格拖拽）、直线、矩形边框、油漆桶填充
+SHAPE_TOOLS = ("pen", "line", "rect", "fill")
+
+
+def line_cells(r0, c0, r1, c1):
+    """Cells on the Bresenham line from (r0, c0) to (r1, c1), both ends included."""
+    dr, dc = abs(r1 - r0), abs(c1 - c0)
+    sr, sc = (1 if r1 >= r0 else -1), (1 if c1 >= c0 else -1)
+    err = dc - dr
+    cells = []
+    r, c = r0, c0
+    while True:
+        cells.append((r, c))
+        if r == r1 and c == c1:
+            return cells
+        e2 = 2 * err
+        if e2 > -dr:
+            err -= dr
+            c += sc
+        if e2 < dc:
+            err += dc
+            r += sr
+
+
+def rect_cells(r0, c0, r1, c1):
+    """Cells on the outline of the rectangle spanned by (r0, c0) and (r1, c1)."""
+    top, bottom = min(r0, r1), max(r0, r1)
+    left, right = min(c0, c1), max(c0, c1)
+    cells = [(top, c) for c in range(left, right + 1)]
+    if bottom != top:
+        cells += [(bottom, c) for c in range(left, right + 1)]
+    cells += [(r, left) for r in range(top + 1, bottom)]
+    if right != left:
+        cells += [(r, right) for r in range(top + 1, bottom)]
+    return cells
 
 
 class ChessboardSquare(QGraphicsRectItem):
@@ -24,25 +83,14 @@ class ChessboardSquare(QGraphicsRectItem):
 
     def mousePressEvent(self, event):
         """鼠标按下事件"""
-        if self.parent_board.is_interactive:
-            if event.button() == Qt.LeftButton:
-                # 左键：添加当前编辑模式的元素
-                self.add_element()
-                if self.parent_board.drag_enabled:
-                    self.parent_board.is_dragging = True
-                    self.parent_board.drag_mode = "add"
-            elif event.button() == Qt.RightButton:
-                # 右键：删除元素（设为空地）
-                self.remove_element()
-                if self.parent_board.drag_enabled:
-                    self.parent_board.is_dragging = True
-                    self.parent_board.drag_mode = "remove"
+        self.parent_board.press_cell(self.row, self.col, event.button())
 
     def hoverEnterEvent(self, event):
         """鼠标进入事件 - 用于拖拽编辑"""
         if (self.parent_board.is_dragging and
                 self.parent_board.is_interactive and
-                self.parent_board.drag_enabled):
+                self.parent_board.drag_enabled and
+                self.parent_board.shape_tool == "pen"):
             if self.parent_board.drag_mode == "add":
                 self.add_element()
             elif self.parent_board.drag_mode == "remove":
@@ -66,22 +114,21 @@ class ChessboardSquare(QGraphicsRectItem):
         """切换方块状态"""
         if self.parent_board.edit_mode == "wall":
             # 墙体编辑模式：在白色(0)和黑色(1)之间切换
-            self.state = 1 if self.state == 0 else 0
+            state = 1 if self.state == 0 else 0
         elif self.parent_board.edit_mode == "output":
             # 出口编辑模式：在白色(0)和绿色(2)之间切换
-            self.state = 2 if self.state == 0 else 0
+            state = 2 if self.state == 0 else 0
         elif self.parent_board.edit_mode == "start":
             # 逃生起点编辑模式：在白色(0)和粉色(3)之间切换
-            self.state = 3 if self.state == 0 else 0
+            state = 3 if self.state == 0 else 0
+        else:
+            return
 
-        self.update_appearance()
-        self.parent_board.update_state_matrix(self.row, self.col, self.state)
+        self.set_state(state)
 
     def set_state(self, state):
-        """设置方块状态"""
-        self.state = state
-        self.update_appearance()
-        self.parent_board.update_state_matrix(self.row, self.col, self.state)
+        """设置方块状态（写入棋盘模型，外观随模型的变化信号更新）"""
+        self.parent_board.set_cell_state(self.row, self.col, state)
 
     def update_appearance(self):
         """更新方块外观"""
@@ -102,15 +149,121 @@ class ChessboardSquare(QGraphicsRectItem):
         self.setPen(QPen(QColor(0, 0, 0), 1))
 
 
+class BoardTile(QGraphicsItem):
+    """
+    One TILE_SIZE x TILE_SIZE block of a large board, drawn as a single image.
+
+    Qt only calls paint() for tiles inside the viewport. When zoomed out so far
+    that a cell is smaller than a screen pixel, the tile draws an aggregated image
+    (k x k cells per pixel, keeping exits/start/walls visible) instead.
+    """
+
+    def __init__(self, board, row0, col0, rows, cols):
+        super().__init__()
+        self.board = board
+        self.row0, self.col0 = row0, col0
+        self.rows, self.cols = rows, cols
+        cell = board.square_size
+        self._rect = QRectF(col0 * cell, row0 * cell, cols * cell, rows * cell)
+        # 各聚合级别的图片缓存 {k: QImage}
+        self._images = {}
+
+    def boundingRect(self):
+        return self._rect
+
+    def invalidate(self):
+        """Tile cells changed: drop the cached images and schedule a repaint."""
+        self._images.clear()
+        self.update()
+
+    def _image(self, k):
+        image = self._images.get(k)
+        if image is None:
+            cells = self.board.cells[self.row0:self.row0 + self.rows, self.col0:self.col0 + self.cols]
+            if k > 1:
+                # 补齐到 k 的整数倍后按块取优先级最高的状态
+                h, w = -(-self.rows // k) * k, -(-self.cols // k) * k
+                rank = np.zeros((h, w), dtype=np.uint8)
+                rank[:self.rows, :self.cols] = LOD_PRIORITY[cells]
+                cells = LOD_STATE[rank.reshape(h // k, k, w // k, k).max(axis=(1, 3))]
+            rgb = np.ascontiguousarray(CELL_COLORS[cells])
+            height, width = rgb.shape[:2]
+            image = QImage(rgb.data, width, height, rgb.strides[0], QImage.Format_RGB888).copy()
+            self._images[k] = image
+        return image
+
+    def paint(self, painter, option, widget=None):
+        # 每格在屏幕上的像素数；小于 1 时按 2 的幂聚合
+        cell_pixels = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform()) * \
+            self.board.square_size
+        k = 1
+        while cell_pixels * k < 1 and k < max(self.rows, self.cols):
+            k *= 2
+        painter.drawImage(self._rect, self._image(k))
+
+    def mousePressEvent(self, event):
+        cell = self.board.cell_at(event.scenePos())
+        if cell is not None:
+            self.board.press_cell(cell[0], cell[1], event.button())
+
+
+class GridItem(QGraphicsItem):
+    """
+    Grid lines over the whole board, drawn only for the exposed area and only
+    when cells are large enough on screen for the lines to be readable.
+    """
+
+    def __init__(self, size, cell):
+        super().__init__()
+        self.size = size
+        self.cell = cell
+        self._rect = QRectF(0, 0, size * cell, size * cell)
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption, True)
+        self.setAcceptedMouseButtons(Qt.NoButton)
+        self.pen = QPen(QColor(0, 0, 0), 1)
+        self.pen.setCosmetic(True)
+
+    def boundingRect(self):
+        return self._rect
+
+    def paint(self, painter, option, widget=None):
+        lod = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+        if lod * self.cell < GRID_MIN_PIXELS:
+            return
+        area = option.exposedRect.intersected(self._rect)
+        first_col, last_col = int(area.left() // self.cell), int(area.right() // self.cell) + 1
+        first_row, last_row = int(area.top() // self.cell), int(area.bottom() // self.cell) + 1
+        last_col, last_row = min(last_col, self.size), min(last_row, self.size)
+
+        lines = [QLineF(i * self.cell, area.top(), i * self.cell, area.bottom())
+                 for i in range(first_col, last_col + 1)]
+        lines += [QLineF(area.left(), i * self.cell, area.right(), i * self.cell)
+                  for i in range(first_row, last_row + 1)]
+        painter.setPen(self.pen)
+        painter.drawLines(lines)
+
+
 class InteractiveChessboard(QtCore.QObject):
     """交互式棋盘类"""
 
-    def __init__(self, graphics_view, size=32):
+    # 鼠标按下某个格子：行, 列, 鼠标按键
+    cell_clicked = pyqtSignal(int, int, int)
+
+    def __init__(self, graphics_view, size=32, tiled=None, model=None):
         super().__init__()
         self.graphics_view = graphics_view
+        # 棋盘状态保存在 BoardModel 中，多个界面可以共享同一个模型
+        self.model = model if model is not None else BoardModel(size)
+        size = self.model.size
         self.size = size
-        view_size = 500
-        self.square_size = view_size // size
+        self.view_size = 500
+        self.square_size = max(self.view_size // size, 1)
+        # 大棋盘使用分块后端：按可见分块绘制，不为每格创建图元
+        self.tiled = size > TILED_THRESHOLD if tiled is None else tiled
+
+        # 缩放与平移
+        self.is_panning = False
+        self._pan_origin = None
 
         # 交互控制
         self.is_interactive = True
@@ -118,36 +271,49 @@ class InteractiveChessboard(QtCore.QObject):
         self.is_dragging = False
         self.drag_mode = "add"  # "add" 或 "remove"
         self.edit_mode = "wall"  # "wall" 或 "output"
+        self.shape_tool = "pen"  # SHAPE_TOOLS 之一
+        self._drag_anchor = None  # 直线/矩形的起点格
+        self._last_drag_cell = None  # 画笔上一次经过的格子
+        self._preview = None  # 直线/矩形的预览图元
 
-
-        # 初始化状态矩阵 (0=空地, 1=墙体, 2=出口, 3=逃生起始点)
-        self.state_matrix = [[0 for _ in range(size)] for _ in range(size)]
+        self._state_brushes = [QBrush(QColor(*color)) for color in CELL_COLORS.tolist()]
 
         # 创建场景
         self.scene = QGraphicsScene()
         self.graphics_view.setScene(self.scene)
 
-        # 存储所有方块
+        # 存储所有方块（分块后端下为空）
         self.squares = []
+        self.tiles = []
+        self.grid_item = None
 
         self.create_chessboard()
         self.setup_mouse_events()
+        self.model.cells_changed.connect(self._on_cells_changed)
+        # 共享模型可能已有内容
+        rows, cols = np.nonzero(self.cells)
+        if len(rows):
+            self._on_cells_changed(rows, cols)
+
+    @property
+    def cells(self):
+        """当前状态数组（只读视图，0=空地, 1=墙体, 2=出口, 3=逃生起始点）"""
+        return self.model.cells
+
+    @property
+    def state_matrix(self):
+        """兼容旧接口：可以按 state_matrix[row][col] 读取"""
+        return self.model.cells
 
     def create_chessboard(self):
         """创建棋盘"""
         self.squares = []
+        self.tiles = []
 
-        for row in range(self.size):
-            square_row = []
-            for col in range(self.size):
-                x = col * self.square_size
-                y = row * self.square_size
-
-                square = ChessboardSquare(x, y, self.square_size, row, col, self)
-                self.scene.addItem(square)
-                square_row.append(square)
-
-            self.squares.append(square_row)
+        if self.tiled:
+            self._create_tiles()
+        else:
+            self._create_squares()
 
         # 设置场景大小
         board_size = self.size * self.square_size
@@ -158,34 +324,240 @@ class InteractiveChessboard(QtCore.QObject):
         self.graphics_view.setDragMode(QtWidgets.QGraphicsView.NoDrag)
         self.graphics_view.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
         self.graphics_view.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.graphics_view.setTransformationAnchor(QtWidgets.QGraphicsView.AnchorUnderMouse)
         self.graphics_view.resetTransform()
-        self.graphics_view.scale(1.0, 1.0)
+        # 分块棋盘缩放到充满视图；小棋盘保持原来的 1:1 显示
+        self.base_scale = self.view_size / board_size if self.tiled else 1.0
+        self.graphics_view.scale(self.base_scale, self.base_scale)
+
+    def _create_tiles(self):
+        """分块后端：每 TILE_SIZE x TILE_SIZE 个格子一个图元，外加一层网格线"""
+        for row0 in range(0, self.size, TILE_SIZE):
+            tile_row = []
+            for col0 in range(0, self.size, TILE_SIZE):
+                tile = BoardTile(self, row0, col0, min(TILE_SIZE, self.size - row0), min(TILE_SIZE, self.size - col0))
+                self.scene.addItem(tile)
+                tile_row.append(tile)
+            self.tiles.append(tile_row)
+
+        self.grid_item = GridItem(self.size, self.square_size)
+        self.grid_item.setZValue(0.5)
+        self.scene.addItem(self.grid_item)
+
+    def _create_squares(self):
+        for row in range(self.size):
+            square_row = []
+            for col in range(self.size):
+                x = col * self.square_size
+                y = row * self.square_size
+
+                square = ChessboardSquare(x, y, self.square_size, row, col, self)
+                self.scene.addItem(square)
+                square_row.append(square)
+
+            self.squares.append(square_row)
 
     def setup_mouse_events(self):
         """设置鼠标事件"""
+        self.viewport = self.graphics_view.viewport()
         self.graphics_view.installEventFilter(self)
-        self.graphics_view.viewport().installEventFilter(self)
+        self.viewport.installEventFilter(self)
 
     def eventFilter(self, obj, event):
         """事件过滤器"""
+        if obj is self.viewport and self._handle_zoom_pan(event):
+            return True
+
         if not self.is_interactive or not self.drag_enabled:
             return super().eventFilter(obj, event)
 
         if event.type() == QtCore.QEvent.MouseButtonRelease:
             if event.button() in [Qt.LeftButton, Qt.RightButton]:
+                if self.is_dragging and self.shape_tool in ("line", "rect"):
+                    self._finish_shape(self._clamped_cell(event.pos()))
                 self.is_dragging = False
-                return True
+                # 不拦截松开事件，让场景释放按下时抓取鼠标的图元，
+                # 否则下一次点击仍会发给上一次按下的方块
+                return False
         elif event.type() == QtCore.QEvent.MouseMove and self.is_dragging:
-            pos = self.graphics_view.mapToScene(event.pos())
-            item = self.scene.itemAt(pos, self.graphics_view.transform())
-            if isinstance(item, ChessboardSquare):
-                if self.drag_mode == "add":
-                    item.add_element()
-                elif self.drag_mode == "remove":
-                    item.remove_element()
+            if self.shape_tool == "pen":
+                cell = self.cell_at(self.graphics_view.mapToScene(event.pos()))
+                if cell is not None:
+                    # 鼠标移动较快时补齐两次事件之间跳过的格子
+                    self.apply_cells(line_cells(*self._last_drag_cell, *cell), self._drag_target())
+                    self._last_drag_cell = cell
+            else:
+                self._show_preview(self._clamped_cell(event.pos()))
             return True
         return super().eventFilter(obj, event)
 
+    def _handle_zoom_pan(self, event):
+        """滚轮缩放，中键拖动平移；返回事件是否已处理"""
+        if event.type() == QtCore.QEvent.Wheel:
+            steps = event.angleDelta().y() / 120
+            if steps:
+                self.zoom(ZOOM_STEP ** steps)
+            return True
+        if event.type() == QtCore.QEvent.MouseButtonPress and event.button() == Qt.MiddleButton:
+            self.is_panning = True
+            self._pan_origin = event.pos()
+            return True
+        if event.type() == QtCore.QEvent.MouseMove and self.is_panning:
+            delta = event.pos() - self._pan_origin
+            self._pan_origin = event.pos()
+            hbar = self.graphics_view.horizontalScrollBar()
+            vbar = self.graphics_view.verticalScrollBar()
+            hbar.setValue(hbar.value() - delta.x())
+            vbar.setValue(vbar.value() - delta.y())
+            return True
+        if event.type() == QtCore.QEvent.MouseButtonRelease and event.button() == Qt.MiddleButton:
+            self.is_panning = False
+            return True
+        return False
+
+    def zoom(self, factor):
+        """以鼠标位置为中心缩放，范围为整盘可见到每格 MAX_CELL_PIXELS 像素"""
+        current = self.graphics_view.transform().m11()
+        max_scale = max(MAX_CELL_PIXELS / self.square_size, self.base_scale)
+        target = min(max(current * factor, self.base_scale), max_scale)
+        if target != current:
+            self.graphics_view.scale(target / current, target / current)
+
+    def reset_zoom(self):
+        self.graphics_view.resetTransform()
+        self.graphics_view.scale(self.base_scale, self.base_scale)
+
+    def cell_at(self, scene_pos):
+        """场景坐标对应的 (行, 列)，在棋盘外时返回 None"""
+        row = int(scene_pos.y() // self.square_size)
+        col = int(scene_pos.x() // self.square_size)
+        if 0 <= row < self.size and 0 <= col < self.size:
+            return row, col
+        return None
+
+    def press_cell(self, row, col, button):
+        """鼠标在 (row, col) 按下：编辑模式下添加/删除元素并开始拖拽"""
+        self.cell_clicked.emit(row, col, int(button))
+        if not self.is_interactive:
+            return
+        if button == Qt.LeftButton:
+            # 左键：添加当前编辑模式的元素
+            self.drag_mode = "add"
+        elif button == Qt.RightButton:
+            # 右键：删除元素（设为空地）
+            self.drag_mode = "remove"
+        else:
+            return
+
+        if self.shape_tool == "fill":
+            self.fill_region(row, col, self._drag_target())
+            return
+        self._drag_anchor = self._last_drag_cell = (row, col)
+        if self.shape_tool == "pen" or not self.drag_enabled:
+            self._drag_edit(row, col)
+        else:
+            self._show_preview((row, col))
+        if self.drag_enabled:
+            self.is_dragging = True
+
+    def _drag_target(self):
+        """当前拖拽模式要写入的状态；None 表示不修改"""
+        if self.drag_mode == "add":
+            return {"wall": 1, "output": 2}.get(self.edit_mode)
+        return 0
+
+    def _drag_edit(self, row, col):
+        """按当前拖拽模式编辑一个格子"""
+        target = self._drag_target()
+        if target is not None and self.state_matrix[row][col] != target:
+            self.set_cell_state(row, col, target)
+
+    def _clamped_cell(self, view_pos):
+        """视图坐标对应的格子，限制在棋盘范围内"""
+        pos = self.graphics_view.mapToScene(view_pos)
+        row = min(max(int(pos.y() // self.square_size), 0), self.size - 1)
+        col = min(max(int(pos.x() // self.square_size), 0), self.size - 1)
+        return row, col
+
+    def _shape_cells(self, cell):
+        if self.shape_tool == "line":
+            return line_cells(*self._drag_anchor, *cell)
+        return rect_cells(*self._drag_anchor, *cell)
+
+    def _show_preview(self, cell):
+        """直线/矩形拖拽中显示虚线预览，松开鼠标时才真正修改格子"""
+        if self._preview is None:
+            self._preview = QtWidgets.QGraphicsPathItem()
+            pen = QPen(QColor(255, 128, 0), 2, Qt.DashLine)
+            pen.setCosmetic(True)
+            self._preview.setPen(pen)
+            self._preview.setZValue(10)
+            self._preview.setAcceptedMouseButtons(Qt.NoButton)
+            self.scene.addItem(self._preview)
+
+        cell_size = self.square_size
+        (r0, c0), (r1, c1) = self._drag_anchor, cell
+        path = QtGui.QPainterPath()
+        if self.shape_tool == "line":
+            path.moveTo((c0 + 0.5) * cell_size, (r0 + 0.5) * cell_size)
+            path.lineTo((c1 + 0.5) * cell_size, (r1 + 0.5) * cell_size)
+        else:
+            path.addRect(QRectF(min(c0, c1) * cell_size, min(r0, r1) * cell_size,
+                                (abs(c1 - c0) + 1) * cell_size, (abs(r1 - r0) + 1) * cell_size))
+        self._preview.setPath(path)
+        self._preview.setVisible(True)
+
+    def _finish_shape(self, cell):
+        if self._preview is not None:
+            self._preview.setVisible(False)
+        self.apply_cells(self._shape_cells(cell), self._drag_target())
+
+    def set_shape_tool(self, tool):
+        """设置编辑工具"""
+        if tool in SHAPE_TOOLS:
+            self.shape_tool = tool
+
+    def set_cell_state(self, row, col, state):
+        """设置一个格子的状态；显示在模型的变化信号中更新"""
+        self.model.set_cell(row, col, state)
+
+    def batch_edit(self):
+        """合并一组格子修改：退出时每个改动的方块只设置一次画刷、每个分块只重绘一次。可以嵌套。"""
+        return self.model.batch()
+
+    def _on_cells_changed(self, rows, cols):
+        """模型中的格子变化后重绘对应的方块或分块"""
+        cells = self.model.cells
+        if self.squares:
+            for row, col, state in zip(rows.tolist(), cols.tolist(), cells[rows, cols].tolist()):
+                square = self.squares[row][col]
+                square.state = state
+                square.setBrush(self._state_brushes[state])
+        else:
+            touched = np.zeros((len(self.tiles), len(self.tiles[0])), dtype=np.bool_)
+            touched[rows // TILE_SIZE, cols // TILE_SIZE] = True
+            for tile_row, tile_col in np.argwhere(touched).tolist():
+                self.tiles[tile_row][tile_col].invalidate()
+
+    def apply_cells(self, cells, state):
+        """
+        在一次批量编辑中把 cells 中（棋盘范围内）的格子设为 state。
+
+        :return: 实际改变的格子数
+        """
+        if state is None:
+            return 0
+        cells = np.asarray(list(cells), dtype=np.intp).reshape(-1, 2)
+        return self.model.set_cells(cells[:, 0], cells[:, 1], state)
+
+    def fill_region(self, row, col, state):
+        """油漆桶：把与 (row, col) 四连通且状态相同的区域设为 state"""
+        if state is None or self.cells[row, col] == state:
+            return 0
+        labels, _ = ndimage.label(self.cells == self.cells[row, col])
+        rows, cols = np.nonzero(labels == labels[row, col])
+        return self.model.set_cells(rows, cols, state)
+
     def set_interactive(self, interactive):
         """设置是否允许交互"""
         self.is_interactive = interactive
@@ -201,72 +573,33 @@ class InteractiveChessboard(QtCore.QObject):
     def update_state_matrix(self, row, col, state):
         """更新状态矩阵"""
         if 0 <= row < self.size and 0 <= col < self.size:
-            self.state_matrix[row][col] = state
+            self.model.set_cell(row, col, state)
 
     def get_state_matrix(self):
-        """获取当前状态矩阵"""
-        return copy.deepcopy(self.state_matrix)
+        """获取当前状态矩阵（二维列表副本）"""
+        return self.model.cells.tolist()
+
+    def get_cells(self):
+        """获取当前状态数组的快照（只读 ndarray，写时复制，不拷贝数据）"""
+        return self.model.snapshot()
 
     def clear_board(self):
         """清空棋盘"""
-        for row in range(self.size):
-            for col in range(self.size):
-                square = self.squares[row][col]
-                square.set_state(0)
-
-        # 重置状态矩阵
-        self.state_matrix = [[0 for _ in range(self.size)] for _ in range(self.size)]
+        self.model.clear()
 
     def set_board_from_matrix(self, matrix):
-        """从矩阵设置棋盘状态"""
-        if not matrix or len(matrix) != self.size:
-            print(f"矩阵大小不匹配: 期望 {self.size}x{self.size}")
-            return
-
-        try:
-            # 更新内部状态矩阵
-            self.state_matrix = copy.deepcopy(matrix)
-
-            # 更新每个方块的显示状态
-            for row in range(self.size):
-                if len(matrix[row]) != self.size:
-                    print(f"矩阵行 {row} 大小不匹配: 期望 {self.size}")
-                    continue
-
-                for col in range(self.size):
-                    state = matrix[row][col]
-                    # 验证状态值有效性
-                    if state not in [0, 1, 2, 3]:
-                        print(f"无效状态值 {state} 在位置 ({row}, {col})")
-                        state = 0  # 默认为空地
-
-                    # 更新方块状态
-                    if row < len(self.squares) and col < len(self.squares[row]):
-                        self.squares[row][col].set_state(state)
-
-            print("棋盘状态已从矩阵更新")
-
-        except Exception as e:
-            print(f"设置棋盘状态时出错: {e}")
+        """从矩阵设置棋盘状态：整盘在数组上校验，只重绘与当前棋盘不同的格子"""
+        changed = self.model.load(matrix)
+        if changed:
+            print(f"棋盘状态已从矩阵更新（{changed} 个格子变化）")
 
     def get_board_statistics(self):
         """获取棋盘统计信息"""
-        wall_count = 0
-        output_count = 0
-        empty_count = 0
-
-        for row in self.state_matrix:
-            for cell in row:
-                if cell == 0:
-                    empty_count += 1
-                elif cell == 1:
-                    wall_count += 1
-                elif cell == 2:
-                    output_count += 1
+        counts = np.bincount(self.cells.ravel(), minlength=4)
 
         return {
-            'empty': empty_count,
-            'wall': wall_count,
-            'output': output_count,
+            'empty': int(counts[0]),
+            'wall': int(counts[1]),
+            'output': int(counts[2]),
             'total': self.size * self.size
         }
\ No newline at end of file
@@ -0,0 +1,263 @@
+import numpy as np
+from typing import Dict, List, Tuple, Optional, Union
+import threading
+from risk_tensor import RiskTensor
+from time_expanded_graph import (TimeExpandedGraph, smoke_storage, check_cancelled, gather_neighbors,
+                                 DIRECTIONS, WALL, EXIT)
+
+
+class EscapeField:
+    """
+    Backward cost-to-go and policy over the whole time-expanded graph.
+
+    One reverse sweep per risk tensor gives, for every state (t, r, c), the minimum
+    cost still to pay before reaching an exit and the best next move. The escape
+    route from any start cell at any departure time is then a table walk instead
+    of a separate UCS run.
+
+    The cost model is the one of layered_dp_search_dynamic: the default weights
+    reproduce uniform_cost_search_dynamic, the A* weights reproduce
+    a_star_search_dynamic. Costs agree with a forward search up to floating-point
+    rounding; on exact ties the chosen path may differ.
+
+    :param grid: 2D map with codes 0/1/2/3
+    :param smoke_time: [T, R, C] ndarray or nested lists of smoke concentrations
+    :param cancel_event: optional threading.Event; when set the sweep raises SearchCancelled
+    """
+
+    # 出口或无法到达出口的状态没有下一步
+    NO_MOVE = -1
+
+    def __init__(
+        self,
+        grid: List[List[int]],
+        smoke_time: Union[np.ndarray, List[List[List[float]]]],
+        w1: float = 1.0,
+        w2: float = 0.0,
+        w3: float = 0.0,
+        danger_threshold: float = 0.4,
+        cancel_event=None
+    ):
+        self.graph = TimeExpandedGraph(grid, smoke_time)
+        self.w1, self.w2, self.w3 = w1, w2, w3
+        self.danger_threshold = danger_threshold
+
+        T, rows, cols = self.graph.T, self.graph.rows, self.graph.cols
+        self.passable = ~self.graph.wall_mask.reshape(rows, cols)
+        self.exits = self.graph.exit_mask.reshape(rows, cols)
+
+        # cost_to_go[t, r, c]：从状态 (t, r, c) 出发（不含当前格代价）到达出口的最小剩余代价
+        # 保持 float64，与正向搜索比较代价时精度相同；改用 float32 会让近似相等的路线选择不同
+        self.cost_to_go = np.full((T, rows, cols), np.inf)
+        # policy[t, r, c]：最优下一步在 DIRECTIONS 中的下标
+        self.policy = np.full((T, rows, cols), self.NO_MOVE, dtype=np.int8)
+
+        if T > 0:
+            self.cost_to_go[T - 1][self.exits] = 0.0
+            for t in range(T - 2, -1, -1):
+                check_cancelled(cancel_event)
+                self._sweep_layer(t)
+
+    def _entry_costs(self, t: int, window=None) -> np.ndarray:
+        """Cost of entering each cell at layer t plus its cost-to-go; inf on walls."""
+        window = window or (slice(None), slice(None))
+        step = self.graph.step_cost_layer(t, self.w1, self.w2, self.w3, self.danger_threshold, window)
+        return np.where(self.passable[window], step + self.cost_to_go[t][window], np.inf)
+
+    def _sweep_layer(self, t: int, window: Optional[Tuple[int, int, int, int]] = None):
+        """
+        Recompute layer t from layer t+1, optionally only inside
+        window = (row_start, row_stop, col_start, col_stop).
+        """
+        rows, cols = self.graph.rows, self.graph.cols
+        r0, r1, c0, c1 = window or (0, rows, 0, cols)
+
+        # 多取一圈邻居作为 halo，窗口内每个格子的 5 邻域都在 halo 中
+        h0, h1 = max(r0 - 1, 0), min(r1 + 1, rows)
+        g0, g1 = max(c0 - 1, 0), min(c1 + 1, cols)
+        entry = self._entry_costs(t + 1, (slice(h0, h1), slice(g0, g1)))
+        candidates = gather_neighbors(entry, np.empty((len(DIRECTIONS), h1 - h0, g1 - g0)), sign=1)
+        candidates = candidates[:, r0 - h0:r1 - h0, c0 - g0:c1 - g0]
+
+        moves = np.argmin(candidates, axis=0)
+        best = np.take_along_axis(candidates, moves[None], axis=0)[0]
+
+        # 出口为终止状态；无法到达出口的状态没有下一步
+        exits = self.exits[r0:r1, c0:c1]
+        best[exits] = 0.0
+        moves = np.where(exits | np.isinf(best), self.NO_MOVE, moves)
+        self.cost_to_go[t, r0:r1, c0:c1] = best
+        self.policy[t, r0:r1, c0:c1] = moves
+
+    def repair(self, changed_cells: Dict[int, np.ndarray], cancel_event=None) -> int:
+        """
+        Repair the field after the smoke of some frames changed in place.
+
+        Only layers below the latest changed frame can be affected, and inside a
+        layer only the neighbourhood of cells whose entry cost changed. Changes are
+        propagated backwards layer by layer (LPA*-style) and stop as soon as a
+        layer's cost-to-go comes out unchanged.
+
+        :param changed_cells: {t: [rows, cols] bool mask of cells whose smoke changed}
+        :param cancel_event: optional threading.Event; when set the repair raises SearchCancelled
+        :return: number of layers recomputed
+        """
+        rows, cols = self.graph.rows, self.graph.cols
+        dirty = np.zeros((rows, cols), dtype=np.bool_)
+        recomputed = 0
+        for t in range(max(changed_cells, default=0) - 1, -1, -1):
+            check_cancelled(cancel_event)
+            # 第 t+1 层“进入代价”发生变化的格子
+            changed = changed_cells.get(t + 1)
+            if changed is not None:
+                dirty |= changed
+            if not dirty.any():
+                continue
+
+            rr, cc = np.nonzero(dirty)
+            r0, r1 = max(rr.min() - 1, 0), min(rr.max() + 2, rows)
+            c0, c1 = max(cc.min() - 1, 0), min(cc.max() + 2, cols)
+            old = self.cost_to_go[t, r0:r1, c0:c1].copy()
+            self._sweep_layer(t, (r0, r1, c0, c1))
+            recomputed += 1
+
+            dirty = np.zeros((rows, cols), dtype=np.bool_)
+            dirty[r0:r1, c0:c1] = old != self.cost_to_go[t, r0:r1, c0:c1]
+        return recomputed
+
+    @property
+    def T(self) -> int:
+        return self.graph.T
+
+    def escape_costs(self, departure_time: int = 0) -> np.ndarray:
+        """[rows, cols] total escape cost for every start cell at `departure_time`."""
+        smoke = self.graph.smoke_layer(departure_time)
+        start = self.w1 * smoke + np.where(smoke >= self.danger_threshold, self.w3, 0.0)
+        return start + self.cost_to_go[departure_time]
+
+    def route(
+        self,
+        start: Tuple[int, int],
+        departure_time: int = 0
+    ) -> Optional[Tuple[float, List[Tuple[int, int, int]]]]:
+        """
+        Walk the policy table from `start` at `departure_time`.
+
+        :return: (total_cost, path list of (time, row, col)), or None if no exit is
+                 reached or the start is outside the grid or on a wall
+        """
+        if not 0 <= departure_time < self.T:
+            return None
+        t = departure_time
+        r, c = start
+        # 负下标会绕到棋盘另一侧，必须在查表前排除
+        if not (0 <= r < self.graph.rows and 0 <= c < self.graph.cols) or not self.passable[r, c]:
+            return None
+        remaining = self.cost_to_go[t, r, c]
+        if np.isinf(remaining):
+            return None
+
+        # 沿路径正向累加代价，与正向搜索的求和顺序一致
+        cost = self.graph.start_cost(t, r, c, self.w1, self.w3, self.danger_threshold)
+        path = [(t, r, c)]
+        while not self.exits[r, c]:
+            dr, dc = DIRECTIONS[self.policy[t, r, c]]
+            t, r, c = t + 1, r + dr, c + dc
+            smoke = self.graph.smoke_at(t, r, c)
+            cost += self.w1 * smoke + self.w2 + (self.w3 if smoke >= self.danger_threshold else 0)
+            path.append((t, r, c))
+        return cost, path
+
+
+class IncrementalEscapePlanner:
+    """
+    Route planner that keeps its EscapeField between queries.
+
+    - Moving the start cell is a table walk on the existing field.
+    - Changing some risk frames repairs only the affected part of the field.
+    - Changing walls/exits, the horizon or the board size rebuilds the field.
+
+    Results equal a fresh uniform_cost_search_dynamic run (default weights) or
+    a_star_search_dynamic run (A* weights), up to tie-breaking between equal-cost paths.
+    """
+
+    def __init__(self, w1: float = 1.0, w2: float = 0.0, w3: float = 0.0, danger_threshold: float = 0.4):
+        self.weights = dict(w1=w1, w2=w2, w3=w3, danger_threshold=danger_threshold)
+        self.field: Optional[EscapeField] = None
+        self._layout = None
+        # 上次的风险数据：只读输入（RiskTensor / 只读数组）直接引用，
+        # 可写数组保存私有副本，调用方原地修改时也能正确找出变化的帧
+        self._smoke: Optional[np.ndarray] = None
+        self._scale = 1.0
+        self.last_repaired_layers = 0
+        # 同一规划器可能被多个后台搜索任务先后使用
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Drop the cached field; the next query rebuilds it."""
+        self.field = None
+        self._layout = None
+        self._smoke = None
+
+    def plan(
+        self,
+        grid: List[List[int]],
+        smoke_time: Union[np.ndarray, List[List[List[float]]]],
+        start: Tuple[int, int],
+        cancel_event=None
+    ) -> Optional[Tuple[float, List[Tuple[int, int, int]]]]:
+        """Same contract as uniform_cost_search_dynamic / a_star_search_dynamic."""
+        with self._lock:
+            try:
+                return self._plan(grid, smoke_time, start, cancel_event)
+            except BaseException:
+                # 中途取消或出错时场可能只更新了一部分，下次查询重建
+                self.invalidate()
+                raise
+
+    def _plan(self, grid, smoke_time, start, cancel_event):
+        grid = np.asarray(grid, dtype=np.int8)
+        # RiskTensor 按存储类型比较与保存，不解码
+        smoke, scale = smoke_storage(smoke_time)
+        immutable = isinstance(smoke_time, RiskTensor) or (
+            isinstance(smoke_time, np.ndarray) and not smoke_time.flags.writeable)
+
+        # 起点标记 (3) 与空地等价，只有墙体/出口布局变化才需要重建
+        layout = (grid.shape, (grid == WALL).tobytes(), (grid == EXIT).tobytes())
+        if (self.field is None or layout != self._layout or
+                smoke.shape != self._smoke.shape or smoke.dtype != self._smoke.dtype or scale != self._scale):
+            self._smoke = smoke if immutable else np.array(smoke)
+            self._scale = scale
+            self.field = EscapeField(grid, self._stored(), cancel_event=cancel_event, **self.weights)
+            self._layout = layout
+            self.last_repaired_layers = self.field.T
+        elif immutable and not self._smoke.flags.writeable and _same_storage(smoke, self._smoke):
+            # 同一份只读数据，无需逐帧比较
+            self.last_repaired_layers = 0
+        else:
+            # 私有副本只在输入可写时逐帧原地更新；其余情况改为引用（或复制）新数据，场的图随之指向新数据
+            in_place = not immutable and self._smoke.flags.writeable
+            changed_cells = {}
+            for t in range(smoke.shape[0]):
+                changed = self._smoke[t] != smoke[t]
+                if changed.any():
+                    changed_cells[t] = changed
+                    if in_place:
+                        self._smoke[t] = smoke[t]
+            if not in_place:
+                self._smoke = smoke if immutable else np.array(smoke)
+                self.field.graph = TimeExpandedGraph(grid, self._stored())
+            self.last_repaired_layers = self.field.repair(changed_cells, cancel_event)
+
+        if self.field.T == 0 or not self.field.exits.any():
+            return None
+        return self.field.route(start)
+
+    def _stored(self):
+        return self._smoke if self._scale == 1.0 else RiskTensor(self._smoke, self._scale)
+
+
+def _same_storage(a: np.ndarray, b: np.ndarray) -> bool:
+    """True when two arrays are views of the same memory with the same layout."""
+    return (a.shape == b.shape and a.strides == b.strides and a.dtype == b.dtype and
+            a.__array_interface__['data'][0] == b.__array_interface__['data'][0])
@@ -0,0 +1,202 @@
+"""
+Headless export of risk / route animations, without any widgets.
+
+A scenario is a directory holding
+    risk.npy     [T, H, W] float risk sequence (memory-mapped when read)
+    plan.npy     [H, W] board states (0 空地, 1 墙体, 2 出口, 3 起点)
+    routes.json  optional {"ucs": [[row, col], ...], "bfs": ..., "a_star": ...}
+
+Usage:
+    python exporter.py scenario_dir [scenario_dir ...] -o out_dir --format png|gif|mp4
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import numpy as np
+from chessboard import GRID_MIN_PIXELS
+from risk_renderer import build_risk_lut, paint_routes, risk_frames_to_rgb, rgb_to_qimage
+
+# 与界面中路线算法的顺序一致（决定路线颜色）
+ROUTE_NAMES = ('ucs', 'bfs', 'a_star')
+FORMATS = ('png', 'gif', 'mp4')
+GRID_COLOR = (0, 0, 0)
+
+
+def save_scenario(path, risk, plan, routes=None):
+    """Write a scenario directory that export_scenario / the CLI can read."""
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    np.save(path / 'risk.npy', np.asarray(risk, dtype=np.float32))
+    np.save(path / 'plan.npy', np.asarray(plan, dtype=np.int8))
+    if routes is not None:
+        named = {name: [list(map(int, cell)) for cell in route or []] for name, route in zip(ROUTE_NAMES, routes)}
+        (path / 'routes.json').write_text(json.dumps(named))
+
+
+def load_scenario(path):
+    """:return: (risk memmap [T, H, W], plan [H, W], routes list or None)"""
+    path = Path(path)
+    risk = np.load(path / 'risk.npy', mmap_mode='r')
+    plan = np.load(path / 'plan.npy')
+    routes = None
+    if (path / 'routes.json').exists():
+        named = json.loads((path / 'routes.json').read_text())
+        routes = [[tuple(cell) for cell in named.get(name) or []] for name in ROUTE_NAMES]
+    return risk, plan, routes
+
+
+def render_frames(risk, plan, t0, t1, routes=None, cell_pixels=1, grid=True, lut=None) -> np.ndarray:
+    """
+    Render frames t0..t1-1 into [N, H * cell_pixels, W * cell_pixels, 3] uint8 images,
+    with the route prefixes visible at each step painted over the risk colours.
+    """
+    lut = build_risk_lut() if lut is None else lut
+    rgb = risk_frames_to_rgb(risk[t0:t1], plan, lut)
+    if routes:
+        for offset, frame in enumerate(rgb):
+            paint_routes(frame, routes, t0 + offset, plan)
+    if cell_pixels > 1:
+        rgb = rgb.repeat(cell_pixels, axis=1).repeat(cell_pixels, axis=2)
+        if grid and cell_pixels >= GRID_MIN_PIXELS:
+            rgb[:, ::cell_pixels] = GRID_COLOR
+            rgb[:, :, ::cell_pixels] = GRID_COLOR
+    return rgb
+
+
+# 工作进程的场景数据：每个进程只接收（或映射）一次，而不是每个任务都传整段张量
+_worker = {}
+
+
+def _init_worker(risk, plan, routes, cell_pixels, grid):
+    if isinstance(risk, (str, os.PathLike)):
+        risk = np.load(risk, mmap_mode='r')
+    _worker.update(risk=risk, plan=plan, routes=routes, cell_pixels=cell_pixels, grid=grid, lut=build_risk_lut())
+
+
+def _render_chunk(t0, t1):
+    w = _worker
+    return render_frames(w['risk'], w['plan'], t0, t1, w['routes'], w['cell_pixels'], w['grid'], w['lut'])
+
+
+def _write_png_chunk(t0, t1, out_dir, prefix):
+    paths = []
+    for offset, frame in enumerate(_render_chunk(t0, t1)):
+        path = os.path.join(out_dir, f"{prefix}_{t0 + offset:05d}.png")
+        if not rgb_to_qimage(frame).save(path, 'PNG'):
+            raise IOError(f"cannot write {path}")
+        paths.append(path)
+    return paths
+
+
+def _chunks(count, chunk_frames):
+    return [(t0, min(t0 + chunk_frames, count)) for t0 in range(0, count, chunk_frames)]
+
+
+def _open_writer(out_path, fmt, fps):
+    """
+    (append(rgb), close()) of an animation writer: GIF through the optional Pillow
+    (or imageio), MP4 through the optional imageio with its ffmpeg plugin.
+    """
+    if fmt == 'gif':
+        try:
+            from PIL import Image
+        except ImportError:
+            Image = None
+        if Image is not None:
+            frames = []
+
+            def close():
+                if frames:
+                    frames[0].save(out_path, save_all=True, append_images=frames[1:],
+                                   duration=int(1000 / fps), loop=0)
+            return lambda rgb: frames.append(Image.fromarray(rgb)), close
+    try:
+        import imageio
+    except ImportError:
+        raise RuntimeError(f"导出 {fmt} 需要安装 " + ("Pillow 或 imageio" if fmt == 'gif' else "imageio 和 imageio-ffmpeg"))
+    writer = imageio.get_writer(out_path, fps=fps)
+    return writer.append_data, writer.close
+
+
+def export_animation(risk, plan, out_path, fmt='png', routes=None, cell_pixels=4, grid=True,
+                     fps=10, workers=None, chunk_frames=16):
+    """
+    Render every frame of a risk sequence on a process pool and write it out.
+
+    :param risk: [T, H, W] risk array, or the path of a .npy file (memory-mapped by each worker)
+    :param out_path: directory for 'png' (one frame_XXXXX.png per step), file path for 'gif' / 'mp4'
+    :param routes: [route per algorithm], each a list of (row, col), or None
+    :param cell_pixels: image pixels per board cell
+    :param workers: number of worker processes (default: CPU count)
+    :return: list of written PNG paths, or [out_path] for an animation
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {FORMATS}")
+    count = len(np.load(risk, mmap_mode='r')) if isinstance(risk, (str, os.PathLike)) else len(risk)
+    if isinstance(risk, np.memmap) and risk.filename:
+        # 内存映射的张量只传路径，各进程自己映射
+        risk = risk.filename
+    plan = np.asarray(plan)
+    os.makedirs(out_path if fmt == 'png' else os.path.dirname(out_path) or '.', exist_ok=True)
+    open_frame = None if fmt == 'png' else _open_writer(out_path, fmt, fps)
+    chunks = _chunks(count, chunk_frames)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(risk, plan, routes, cell_pixels, grid)) as pool:
+        if fmt == 'png':
+            futures = [pool.submit(_write_png_chunk, t0, t1, out_path, 'frame') for t0, t1 in chunks]
+            return [path for future in futures for path in future.result()]
+
+        # 动画必须按顺序写入：最多同时渲染 2 倍进程数的块，限制内存占用
+        append, close = open_frame
+        window = 2 * (workers or os.cpu_count() or 1)
+        pending = [pool.submit(_render_chunk, t0, t1) for t0, t1 in chunks[:window]]
+        next_chunk = len(pending)
+        try:
+            while pending:
+                for frame in pending.pop(0).result():
+                    append(frame)
+                if next_chunk < len(chunks):
+                    pending.append(pool.submit(_render_chunk, *chunks[next_chunk]))
+                    next_chunk += 1
+        finally:
+            close()
+    return [out_path]
+
+
+def export_scenario(scenario_dir, out_dir, fmt='png', **options):
+    """Export one scenario directory to out_dir/<name>/ (png) or out_dir/<name>.<fmt>."""
+    risk, plan, routes = load_scenario(scenario_dir)
+    name = Path(scenario_dir).resolve().name
+    out_path = Path(out_dir) / (name if fmt == 'png' else f"{name}.{fmt}")
+    return export_animation(risk, plan, str(out_path), fmt, routes, **options)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="导出风险 / 逃生路线动画（无界面）")
+    parser.add_argument("scenarios", nargs="+", help="场景目录（risk.npy, plan.npy, 可选 routes.json）")
+    parser.add_argument("-o", "--out", default="export", help="输出目录")
+    parser.add_argument("--format", choices=FORMATS, default="png")
+    parser.add_argument("--cell-pixels", type=int, default=4, help="每格像素数")
+    parser.add_argument("--no-grid", action="store_true", help="不画网格线")
+    parser.add_argument("--fps", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=None, help="渲染进程数，默认为 CPU 核数")
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for scenario in args.scenarios:
+        try:
+            written = export_scenario(scenario, args.out, args.format, cell_pixels=args.cell_pixels,
+                                      grid=not args.no_grid, fps=args.fps, workers=args.workers)
+            print(f"{scenario}: 导出 {len(written)} 个文件")
+        except Exception as e:
+            failed += 1
+            print(f"{scenario}: 导出失败: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
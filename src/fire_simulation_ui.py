@@ -1,33 +1,76 @@
 from PyQt5 import QtCore, QtGui, QtWidgets
 from PyQt5.QtWidgets import QMessageBox, QSlider
-from PyQt5.QtCore import Qt, QTimer
-from PyQt5.QtGui import QBrush, QColor
+from PyQt5.QtCore import Qt
 from chessboard import InteractiveChessboard
 from typing import List, Tuple, Optional
 import copy
 import numpy as np
-from model_definitions import SmokeRiskPredictor
-from UCS import uniform_cost_search_dynamic
+from scipy import ndimage
+from predictor_service import PredictorService
+from smoke_simulator import SmokeSpreadSimulator, DEFAULT_TIME_STEPS
+from risk_stream import RiskStream
+from risk_tensor import RiskTensor
 from BFS import bfs_search_dynamic
-from A_star import a_star_search_dynamic
+from escape_field import IncrementalEscapePlanner
+from route_cache import RouteCache
+from route_worker import RouteSearchPool
+from risk_renderer import CellDiffPainter, RasterRiskLayer, RiskFrameRenderer, risk_frame_to_rgb, state_to_rgb
+from route_overlay import RouteOverlay
+from playback import PlaybackScheduler
 
 class FireSimulationUI(QtWidgets.QWidget):
     """火灾仿真界面"""
 
+    # escape_routes 中各算法的顺序
+    ROUTE_ALGORITHMS = ('ucs', 'bfs', 'a_star')
+    # 风险显示模式："raster" 整帧渲染为一张图片，"cells" 逐个方块设置画刷
+    RENDER_MODES = ('raster', 'cells')
+
     def __init__(self, interface_manager):
         super().__init__()
         self.interface_manager = interface_manager
         self.simulation_data = None # 存储模拟数据
         self.current_mode = "none"  # "start_point", "none"
         self.start_point = None  # 逃生起点 (row, col)
-        self.risk_data = None  # 三维风险数据 [time][x][y]
+        self.risk_data = None  # 三维风险数据 [time][x][y]，紧凑存储的只读 RiskTensor
         self.escape_routes = []  # 逃生路线数据 [算法1, 算法2, 算法3]
+        # UCS / A* 增量规划器：在多次路线计算之间保留搜索状态，只修复受影响的部分
+        # A* 权重与 a_star_search_dynamic 的默认参数一致
+        self.ucs_planner = IncrementalEscapePlanner()
+        self.a_star_planner = IncrementalEscapePlanner(w1=0.6, w2=0.3, w3=0.1, danger_threshold=0.4)
+        # 无模型时的风险来源：向量化的烟雾扩散模拟
+        self.smoke_simulator = SmokeSpreadSimulator()
+        # 流式风险计算：每算出一帧就可以显示，路线搜索使用已就绪的前缀
+        self.risk_stream = RiskStream(self)
+        self.risk_stream.progress.connect(self._on_risk_progress)
+        self.risk_stream.finished.connect(self._on_risk_finished)
+        self.risk_stream.failed.connect(self._on_risk_failed)
+        # 当前风险数据所属的流式请求编号（来自磁盘缓存时为 None）
+        self._risk_stream_request = None
+        # 路线结果缓存：地图、风险数据、起点和算法参数都未变化时直接复用结果
+        self.route_cache = RouteCache(max_entries=32)
+        # 后台路线搜索线程池
+        self.route_pool = RouteSearchPool(max_workers=len(self.ROUTE_ALGORITHMS))
+        self.route_pool.route_finished.connect(self._on_route_finished)
+        self.route_pool.route_failed.connect(self._on_route_failed)
+        self.route_pool.route_cancelled.connect(self._on_route_cancelled)
+        self._pending_routes = set()
+        self._route_errors = []
+        self._route_cancelled = False
+        # 界面隐藏期间棋盘发生过变化，显示时需要重绘风险图层
+        self._board_display_stale = False
         self.current_time_step = 0
         self.max_time_steps = 0
-        self.auto_play_timer = QTimer()
-        self.auto_play_timer.timeout.connect(self.auto_play_step)
+        self.render_mode = "raster"
         self.setup_ui()
-        self.predictor=None
+        # 按真实时间播放：绘制跟不上时跳帧，后台线程预先渲染后续帧
+        self.playback = PlaybackScheduler(prefetch=self.frame_renderer.prefetch, parent=self)
+        self.playback.frame_due.connect(self.time_slider.setValue)
+        self.playback.finished.connect(lambda: print("自动播放完成"))
+        # 风险模型由界面管理器在后台加载并预热，各界面共享同一个实例
+        self.predictor_service = interface_manager.predictor_service
+        self.predictor_service.status_changed.connect(self._on_predictor_status)
+        self._on_predictor_status(self.predictor_service.status, self.predictor_service.message)
 
 
     def setup_ui(self):
@@ -59,10 +102,29 @@ class FireSimulationUI(QtWidgets.QWidget):
         self.graphics_view.setGeometry(QtCore.QRect(40, 140, 500, 500))
 
         # 创建交互式棋盘
-        self.chessboard = InteractiveChessboard(self.graphics_view, size=32)
+        self.chessboard = InteractiveChessboard(self.graphics_view, model=self.interface_manager.board_model)
         # 设置为仿真专用棋盘
         self.chessboard.set_interactive(False)
         self.chessboard.set_drag_enabled(False)
+        # 栅格风险图层（覆盖在方块之上，不拦截鼠标）
+        self.raster_layer = RasterRiskLayer(self.chessboard)
+        # 预先通过颜色查找表渲染好的风险帧（有界缓存）
+        self.frame_renderer = RiskFrameRenderer()
+        # 方块模式：记录每个方块当前颜色，换帧时只重绘变化的方块
+        self.cell_painter = CellDiffPainter(self.chessboard)
+        # 路线单独绘制在风险图层之上，随时间步增长或回退
+        self.route_overlay = RouteOverlay(self.chessboard)
+
+        # 风险模型加载状态
+        self.lb_model_status = QtWidgets.QLabel(self)
+        self.lb_model_status.setGeometry(QtCore.QRect(40, 650, 500, 30))
+        self.lb_model_status.setStyleSheet("""
+            QLabel {
+                color: white;
+                font-size: 14px;
+                font-weight: bold;
+            }
+        """)
 
         # 创建提示框 - 修改尺寸以容纳更多内容
         self.lb_tips = QtWidgets.QLabel(self)
@@ -95,16 +157,22 @@ class FireSimulationUI(QtWidgets.QWidget):
         self.lb_tips.raise_()
         self.time_slider.raise_()
         self.lb_time_display.raise_()
+        self.cb_speed.raise_()
+        self.lb_model_status.raise_()
         self.btn_set_start.raise_()
         self.btn_calc_risk.raise_()
         self.btn_calc_route.raise_()
         self.btn_back.raise_()
+        self.btn_cancel_route.raise_()
 
         # 连接信号
         self.btn_set_start.clicked.connect(self.on_set_start_clicked)
         self.btn_calc_risk.clicked.connect(self.on_calc_risk_clicked)
         self.btn_calc_route.clicked.connect(self.on_calc_route_clicked)
         self.btn_back.clicked.connect(self.on_back_clicked)
+        self.btn_cancel_route.clicked.connect(self.on_cancel_route_clicked)
+        self.chessboard.cell_clicked.connect(self._on_cell_clicked)
+        self.chessboard.model.cells_changed.connect(self._on_board_changed)
 
     def setup_time_slider(self):
         """设置时间滑块"""
@@ -156,7 +224,7 @@ class FireSimulationUI(QtWidgets.QWidget):
 
         # 时间显示标签
         self.lb_time_display = QtWidgets.QLabel(self)
-        self.lb_time_display.setGeometry(QtCore.QRect(610, 500, 280, 30))
+        self.lb_time_display.setGeometry(QtCore.QRect(590, 500, 230, 30))
         self.lb_time_display.setStyleSheet("""
             QLabel {
                 color: white;
@@ -168,6 +236,15 @@ class FireSimulationUI(QtWidgets.QWidget):
         self.lb_time_display.setText("时间: 0 / 0")
         self.lb_time_display.setAlignment(QtCore.Qt.AlignCenter)
 
+        # 播放速度
+        self.cb_speed = QtWidgets.QComboBox(self)
+        self.cb_speed.setGeometry(QtCore.QRect(830, 500, 90, 30))
+        self.cb_speed.setStyleSheet("font-size: 14px;")
+        for speed in PlaybackScheduler.SPEEDS:
+            self.cb_speed.addItem(f"{speed:g}x", speed)
+        self.cb_speed.setCurrentIndex(PlaybackScheduler.SPEEDS.index(1.0))
+        self.cb_speed.currentIndexChanged.connect(self.on_speed_changed)
+
         # 连接滑块信号
         self.time_slider.valueChanged.connect(self.on_time_changed)
 
@@ -263,6 +340,31 @@ class FireSimulationUI(QtWidgets.QWidget):
             }
         """)
 
+        # 取消路线计算按钮 - 灰色，仅在后台计算时显示
+        self.btn_cancel_route = QtWidgets.QPushButton(self)
+        self.btn_cancel_route.setGeometry(QtCore.QRect(550, 690, 420, 40))
+        self.btn_cancel_route.setText("取消路线计算")
+        self.btn_cancel_route.setVisible(False)
+        self.btn_cancel_route.setStyleSheet("""
+            QPushButton {
+                font: 75 14pt "Arial";
+                background-color: rgba(108, 117, 125, 180);
+                border: 1px solid rgba(108, 117, 125, 180);
+                border-radius: 12px;
+                color: white;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background-color: rgba(108, 117, 125, 220);
+            }
+        """)
+
+    def _on_predictor_status(self, status, message):
+        """显示风险模型的加载状态"""
+        colors = {PredictorService.READY: '#7CFC00', PredictorService.FAILED: '#FF6347'}
+        self.lb_model_status.setStyleSheet(f"QLabel {{ color: {colors.get(status, 'white')}; font-size: 14px; font-weight: bold; }}")
+        self.lb_model_status.setText(message)
+
     def _update_tips_display(self):
         """更新提示框显示内容"""
         # 操作提示
@@ -288,33 +390,16 @@ class FireSimulationUI(QtWidgets.QWidget):
             self.current_mode = "start_point"
             self.chessboard.set_interactive(True)
             self.chessboard.set_edit_mode("start")
-            # 重写鼠标事件处理
-            self._setup_start_point_mode()
             print("进入起点设置模式")
         else:
             self.current_mode = "none"
             self.chessboard.set_interactive(False)
             print("退出起点设置模式")
 
-    def _setup_start_point_mode(self):
-        """设置起点选择模式"""
-        # 为棋盘的每个方块添加起点设置的鼠标事件
-        for row in range(self.chessboard.size):
-            for col in range(self.chessboard.size):
-                square = self.chessboard.squares[row][col]
-                # 重写鼠标点击事件
-                original_mouse_press = square.mousePressEvent
-
-                def make_start_point_handler(r, c, original_handler):
-                    def start_point_handler(event):
-                        if self.current_mode == "start_point" and event.button() == Qt.LeftButton:
-                            self._set_start_point(r, c)
-                        else:
-                            original_handler(event)
-
-                    return start_point_handler
-
-                square.mousePressEvent = make_start_point_handler(row, col, original_mouse_press)
+    def _on_cell_clicked(self, row, col, button):
+        """起点设置模式下左键点击格子设置起点"""
+        if self.current_mode == "start_point" and button == Qt.LeftButton:
+            self._set_start_point(row, col)
 
     def _set_start_point(self, row, col):
         """设置起点"""
@@ -329,11 +414,11 @@ class FireSimulationUI(QtWidgets.QWidget):
             if (0 <= old_row < self.chessboard.size and
                     0 <= old_col < self.chessboard.size and
                     self.chessboard.state_matrix[old_row][old_col] == 3):
-                self.chessboard.squares[old_row][old_col].set_state(0)
+                self.chessboard.set_cell_state(old_row, old_col, 0)
 
         # 设置新起点
         self.start_point = (row, col)
-        self.chessboard.squares[row][col].set_state(3)  # 3代表起点
+        self.chessboard.set_cell_state(row, col, 3)  # 3代表起点
 
         # 检查是否有逃生路线
         if self._check_escape_route_exists(row, col):
@@ -341,7 +426,7 @@ class FireSimulationUI(QtWidgets.QWidget):
             QMessageBox.information(self, '起点设置', f'起点已设置在位置 ({row}, {col})')
         else:
             # 没有逃生路线，取消起点设置
-            self.chessboard.squares[row][col].set_state(0)
+            self.chessboard.set_cell_state(row, col, 0)
             self.start_point = None
             QMessageBox.warning(self, '无逃生路线', '该位置没有可用的逃生路线，请选择其他位置！')
 
@@ -350,39 +435,38 @@ class FireSimulationUI(QtWidgets.QWidget):
         self.current_mode = "none"
         self.chessboard.set_interactive(False)
 
-    def _check_escape_route_exists(self, start_row, start_col):
-        """检查是否存在逃生路线（简单的BFS检查）"""
-        from collections import deque
-
-        matrix = self.chessboard.get_state_matrix()
-        rows, cols = len(matrix), len(matrix[0])
-
-        # BFS寻找到出口的路径
-        queue = deque([(start_row, start_col)])
-        visited = set()
-        visited.add((start_row, start_col))
-
-        directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
-
-        while queue:
-            row, col = queue.popleft()
-
-            # 检查是否到达出口
-            if matrix[row][col] == 2:
-                return True
-
-            # 探索四个方向
-            for dr, dc in directions:
-                new_row, new_col = row + dr, col + dc
-
-                if (0 <= new_row < rows and 0 <= new_col < cols and
-                        (new_row, new_col) not in visited and
-                        matrix[new_row][new_col] != 1):  # 不是墙体
+    def _on_board_changed(self, rows, cols):
+        """共享棋盘变化（本界面设置起点或其他界面编辑）后同步起点和风险图层"""
+        if self.start_point and self.chessboard.cells[self.start_point] != 3:
+            self.start_point = None
 
-                    visited.add((new_row, new_col))
-                    queue.append((new_row, new_col))
+        # 本界面隐藏时（在编辑器中绘制）只记下需要重绘，切换回来时再统一刷新
+        if not self.isVisible():
+            self._board_display_stale = True
+            return
+        self._sync_board_display()
+
+    def _sync_board_display(self):
+        """把共享棋盘的墙体/出口/起点同步到风险图层"""
+        self._board_display_stale = False
+        # 墙体/出口/起点的颜色画在风险帧里，栅格图层需要重绘
+        self.frame_renderer.set_state(self.chessboard.cells)
+        self.cell_painter.invalidate()
+        if self.raster_layer.is_visible():
+            self._render_raster_frame(self.current_time_step)
+
+    def showEvent(self, event):
+        """界面显示时补上隐藏期间的棋盘变化"""
+        super().showEvent(event)
+        if self._board_display_stale:
+            self._sync_board_display()
 
-        return False
+    def _check_escape_route_exists(self, start_row, start_col):
+        """检查是否存在逃生路线（起点与某个出口是否在同一个四连通区域内）"""
+        matrix = self.chessboard.cells
+        labels, _ = ndimage.label(matrix != 1)
+        region = labels[start_row, start_col]
+        return bool(region) and bool(np.any((labels == region) & (matrix == 2)))
 
     def on_calc_risk_clicked(self):
         """风险计算"""
@@ -392,27 +476,35 @@ class FireSimulationUI(QtWidgets.QWidget):
 
         try:
             # 示例实现（实际使用时替换为真实的函数调用）
-            matrix = self.chessboard.get_state_matrix()
-            for i in range(len(matrix)):
-                for j in range(len(matrix[i])):
-                    if matrix[i][j] in (2, 3):
-                        matrix[i][j] = 0
-
-            if self.predictor is None:
-                try:
-                    model_path='smoke_risk_model_complete.pth'
-                    self.predictor=SmokeRiskPredictor(model_path=model_path)
-                    print("模型加载成功")
-                except Exception as e:
-                    QMessageBox.critical(self,'模型加载失败',f'无法加载风险预测模型:{str(e)}')
-                    return
+            cells = self.chessboard.get_cells()
+            matrix = np.where((cells == 2) | (cells == 3), 0, cells)
 
             floor_plan=np.array(matrix,dtype=np.float32)
-            risk_sequence=self.predictor.predict(floor_plan)
-            self.risk_data=risk_sequence.tolist()
+            # 磁盘缓存中已有该地图的预测结果时直接使用，无需等待模型
+            risk_sequence=self.predictor_service.lookup(floor_plan)
+            if risk_sequence is None:
+                if self.predictor_service.is_ready():
+                    frames=self.predictor_service.predict_stream(floor_plan)
+                elif self.predictor_service.status == PredictorService.FAILED:
+                    # 模型不可用：改用烟雾扩散模拟（以起点为火源），并在后台重新尝试加载模型
+                    print(f"风险预测模型不可用（{self.predictor_service.error}），使用烟雾扩散模拟")
+                    frames=self.smoke_simulator.stream(cells, [self.start_point])
+                    self.predictor_service.start()
+                else:
+                    QMessageBox.information(self,'模型加载中','风险预测模型正在后台加载，请稍候再试')
+                    return
+                # 后台逐帧计算，先算出的帧先显示
+                self._start_risk_stream(frames, cells.shape)
+                return
+
+            self.risk_stream.cancel()
+            self._risk_stream_request = None
+            # 缓存文件为内存映射的 float32，直接包装，不读入内存
+            self.risk_data=RiskTensor(risk_sequence)
 
             if self.risk_data is not None:
                 self.max_time_steps = len(self.risk_data)
+                self._prepare_risk_frames()
                 self.time_slider.setMaximum(self.max_time_steps - 1)
                 self.time_slider.setEnabled(True)
                 self.time_slider.setValue(0)
@@ -431,80 +523,175 @@ class FireSimulationUI(QtWidgets.QWidget):
             QMessageBox.critical(self, '错误', f'风险计算时发生错误: {str(e)}')
             print(f"风险计算错误: {e}")
 
-    def _mock_calculate_fire_risk(self, matrix: List[List[int]], start_point: Tuple[int, int]) -> List[List[List[float]]]:
-        """模拟风险计算函数（实际使用时替换为真实函数）"""
-        rows, cols = len(matrix), len(matrix[0])
-        time_steps = 64  # 假设20个时间步
-
-        risk_data = []
-        start_row, start_col = start_point
-
-        for t in range(time_steps):
-            time_risk = np.zeros((rows, cols))
-
-            # 模拟火灾从起点扩散
-            for i in range(rows):
-                for j in range(cols):
-                    if matrix[i][j] == 1:  # 墙体
-                        continue
-
-                    # 计算距离起点的距离
-                    distance = abs(i - start_row) + abs(j - start_col)
-
-                    # 随时间扩散的风险值
-                    if distance <= t * 0.5:
-                        time_risk[i][j] = max(0, min(0.9, (t * 0.1 - distance * 0.05)))
+    def _start_risk_stream(self, frames, shape):
+        """开始流式风险计算：清空旧结果，等待第一帧"""
+        self.playback.stop()
+        self.risk_data = None
+        self.max_time_steps = 0
+        self.current_time_step = 0
+        self.time_slider.setEnabled(False)
+        self.lb_time_display.setText("风险计算中...")
+        self._risk_stream_request = self.risk_stream.start(
+            frames, shape, DEFAULT_TIME_STEPS, self.interface_manager.risk_dtype)
+        print("风险计算已在后台开始")
+
+    def _on_risk_progress(self, request_id, ready):
+        """新的风险帧已就绪：扩展时间轴，第一帧到达时立即显示"""
+        if request_id != self.risk_stream.request_id or ready == 0:
+            return
+        first = self.max_time_steps == 0
+        # 先于前缀读取：计算已结束时前缀一定包含全部帧
+        streaming = self.risk_stream.is_running()
+        # 只读前缀视图：已写入的帧不再改变，路线搜索可以直接使用
+        self.risk_data = self.risk_stream.prefix()
+        if first:
+            self.frame_renderer.set_sequence(self.risk_data, self.chessboard.cells)
+        else:
+            self.frame_renderer.extend_sequence(self.risk_data)
+        self.max_time_steps = len(self.risk_data)
+        self.time_slider.setMaximum(self.max_time_steps - 1)
+        if first:
+            self.time_slider.setEnabled(True)
+            self.time_slider.setValue(0)
+            self._update_risk_display(0)
+        if self.playback.is_active():
+            # 播放已追上最后一帧时会在此等待，新帧到达后继续播放
+            self.playback.extend(self.max_time_steps - 1, streaming=streaming)
+        self._update_time_display()
 
-            risk_data.append(time_risk.tolist())
+    def _on_risk_finished(self, request_id, total):
+        if request_id != self.risk_stream.request_id:
+            return
+        self.frame_renderer.prefill(self.current_time_step)
+        QMessageBox.information(self, '计算完成', f'风险计算完成！共 {total} 个时间步。')
+        print(f"风险计算完成，时间步数: {total}")
 
-        return risk_data
+    def _on_risk_failed(self, request_id, message):
+        if request_id != self.risk_stream.request_id:
+            return
+        if self.playback.is_active():
+            # 不会再有新帧：播放到已有的最后一帧为止
+            self.playback.extend(self.max_time_steps - 1, streaming=False)
+        QMessageBox.critical(self, '错误', f'风险计算时发生错误: {message}')
+        print(f"风险计算错误: {message}")
 
     def on_calc_route_clicked(self):
         """路线计算"""
         if not self.start_point:
             QMessageBox.warning(self, '未设置起点', '请先设置逃生起点！')
             return
+        if self.risk_data is None or len(self.risk_data) == 0:
+            QMessageBox.warning(self, '未计算风险', '请先进行风险预测，等待第一帧显示后再寻找路线！')
+            return
 
         try:
-            # 调用三个不同的搜索算法
-            matrix = self.chessboard.get_state_matrix()
+            # 三个搜索算法同时提交到后台线程池，每条路线算完即绘制
+            # 快照为写时复制的只读数组，后台搜索期间编辑棋盘不会影响它
+            matrix = self.chessboard.get_cells()
+            risk_data = self.risk_data
+            start_point = self.start_point
+
+            def ucs_task(cancel_event):
+                return self._cached_route_search(
+                    'ucs', matrix, risk_data, start_point,
+                    lambda: self.ucs_planner.plan(matrix, risk_data, start_point, cancel_event),
+                    **self.ucs_planner.weights)
+
+            def bfs_task(cancel_event):
+                return self._cached_route_search(
+                    'bfs', matrix, risk_data, start_point,
+                    lambda: bfs_search_dynamic(matrix, risk_data, start_point, cancel_event))
+
+            def a_star_task(cancel_event):
+                return self._cached_route_search(
+                    'a_star', matrix, risk_data, start_point,
+                    lambda: self.a_star_planner.plan(matrix, risk_data, start_point, cancel_event),
+                    **self.a_star_planner.weights)
+
+            self.playback.stop()
+            self.escape_routes = [[], [], []]
+            self._pending_routes = set(self.ROUTE_ALGORITHMS)
+            self._route_errors = []
+            self._route_cancelled = False
+            self.btn_cancel_route.setVisible(True)
+            # 已完成的任务可能在 submit 内同步回调，状态需在提交前准备好
+            self.route_pool.submit({
+                'ucs': ucs_task,
+                'bfs': bfs_task,
+                'a_star': a_star_task,
+            })
+            self._refresh_risk_and_routes()
+            print("路线计算已提交到后台")
 
-            ucs_result = uniform_cost_search_dynamic(matrix, self.risk_data, self.start_point)
-            if ucs_result:
-                cost, path = ucs_result
-                route1 = [(r, c) for t, r, c in path]
-            else:
-                route1 = []
+        except Exception as e:
+            QMessageBox.critical(self, '错误', f'路线计算时发生错误: {str(e)}')
+            print(f"路线计算错误: {e}")
 
-            bfs_result = bfs_search_dynamic(matrix, self.risk_data, self.start_point)
-            if bfs_result:
-                cost, path = bfs_result
-                route2 = [(r, c) for t, r, c in path]
-            else:
-                route2 = []
+    def _cached_route_search(self, algorithm, matrix, risk_data, start_point, search, **params):
+        """通过路线缓存执行一次搜索，命中时直接返回之前的结果（在工作线程中调用）"""
+        key = self.route_cache.make_key(matrix, risk_data, start_point, algorithm, **params)
+        return self.route_cache.get_or_compute(key, search)
 
-            a_star_result = a_star_search_dynamic(matrix, self.risk_data, self.start_point)
-            if a_star_result:
-                cost, path = a_star_result
-                route3 = [(r, c) for t, r, c in path]
-            else:
-                route3 = []
+    def on_cancel_route_clicked(self):
+        """取消正在进行的路线计算"""
+        self.route_pool.cancel()
 
-            self.escape_routes = [route1, route2, route3]
+    def _on_route_finished(self, request_id, algorithm, result):
+        """某个算法的路线计算完成（GUI线程）"""
+        if request_id != self.route_pool.request_id:
+            return
+        if result:
+            cost, path = result
+            route = [(r, c) for t, r, c in path]
+        else:
+            route = []
+        self.escape_routes[self.ROUTE_ALGORITHMS.index(algorithm)] = route
 
-            if any(route for route in self.escape_routes):
-                # 更新提示框显示路线统计，而不是弹窗
-                self._update_tips_display()
+        # 先画出已完成的路线
+        self._update_tips_display()
+        self._refresh_risk_and_routes()
+        self._finish_route_task(algorithm)
 
-                # 自动播放一次时间流逝
-                self._start_auto_play()
-                print("路线计算完成，开始自动播放")
-            else:
-                QMessageBox.warning(self, '无路径', '未找到有效的逃生路径！')
+    def _on_route_failed(self, request_id, algorithm, message):
+        if request_id != self.route_pool.request_id:
+            return
+        print(f"路线计算错误 [{algorithm}]: {message}")
+        self._route_errors.append(f"{algorithm}: {message}")
+        self._finish_route_task(algorithm)
 
-        except Exception as e:
-            QMessageBox.critical(self, '错误', f'路线计算时发生错误: {str(e)}')
-            print(f"路线计算错误: {e}")
+    def _on_route_cancelled(self, request_id, algorithm):
+        if request_id != self.route_pool.request_id:
+            return
+        print(f"路线计算已取消 [{algorithm}]")
+        self._route_cancelled = True
+        self._finish_route_task(algorithm)
+
+    def _finish_route_task(self, algorithm):
+        """记录一个算法结束；全部结束后开始播放或给出提示"""
+        self._pending_routes.discard(algorithm)
+        if self._pending_routes:
+            return
+
+        self.btn_cancel_route.setVisible(False)
+        stats = self.route_cache.stats()
+        print(f"路线缓存: 命中 {stats['hits']} / 未命中 {stats['misses']}")
+        if self._route_errors:
+            QMessageBox.critical(self, '错误', '路线计算时发生错误: ' + '; '.join(self._route_errors))
+
+        if any(route for route in self.escape_routes):
+            # 更新提示框显示路线统计，而不是弹窗
+            self._update_tips_display()
+
+            # 自动播放一次时间流逝
+            self._start_auto_play()
+            print("路线计算完成，开始自动播放")
+        elif not self._route_errors and not self._route_cancelled:
+            QMessageBox.warning(self, '无路径', '未找到有效的逃生路径！')
+
+    def _refresh_risk_and_routes(self):
+        """按当前时间步重绘风险和路线"""
+        self._update_risk_display(self.current_time_step)
+        self._update_route_display(self.current_time_step)
 
     def _simple_pathfinding(self, matrix: List[List[int]], start_point: Tuple[int, int]) -> List[Tuple[int, int]]:
         """简单的路径查找算法（用于演示）"""
@@ -543,31 +730,50 @@ class FireSimulationUI(QtWidgets.QWidget):
     def _start_auto_play(self):
         """开始自动播放"""
         if self.max_time_steps > 0:
-            self.current_time_step = 0
-            self.time_slider.setValue(0)
-            self.auto_play_timer.start(100)  # 每200ms更新一次
+            # 风险帧仍在流式到达时，播到最后一帧后等待新帧而不是结束
+            self.playback.start(0, self.max_time_steps - 1, streaming=self.risk_stream.is_running())
 
-    def auto_play_step(self):
-        """自动播放的每一步"""
-        if self.current_time_step < self.max_time_steps - 1:
-            self.current_time_step += 1
-            self.time_slider.setValue(self.current_time_step)
-        else:
-            self.auto_play_timer.stop()
-            print("自动播放完成")
+    def on_speed_changed(self, index):
+        """切换播放速度，播放中也立即生效"""
+        self.playback.set_speed(self.cb_speed.itemData(index))
 
     def on_time_changed(self, value):
         """时间滑块值改变"""
         self.current_time_step = value
         self._update_time_display()
 
-        # 更新风险显示
-        if self.risk_data:
-            self._update_risk_display(value)
+        # 更新风险和路线显示
+        self._refresh_risk_and_routes()
 
-        # 更新路线显示
-        if self.escape_routes:
-            self._update_route_display(value)
+    def set_render_mode(self, mode):
+        """切换风险显示模式"""
+        if mode not in self.RENDER_MODES or mode == self.render_mode:
+            return
+        if mode == "cells" and self.chessboard.tiled:
+            # 分块棋盘没有逐格的方块图元
+            print("大棋盘只支持栅格显示模式")
+            return
+        self.render_mode = mode
+        if mode != "raster":
+            self.raster_layer.hide()
+            self.cell_painter.invalidate()
+        self._refresh_risk_and_routes()
+
+    def _render_raster_frame(self, time_step):
+        """栅格模式：将风险帧和路线整体渲染为一张图片"""
+        if self.risk_data is None or time_step >= len(self.risk_data):
+            self.raster_layer.hide()
+            return
+
+        if self.frame_renderer.risk is not self.risk_data:
+            self.frame_renderer.set_sequence(self.risk_data, self.chessboard.cells)
+
+        self.raster_layer.show_image(self.frame_renderer.frame(time_step))
+
+    def _prepare_risk_frames(self):
+        """风险计算完成后一次性把所有帧转换为图片（受缓存大小限制）"""
+        self.frame_renderer.set_sequence(self.risk_data, self.chessboard.cells)
+        self.frame_renderer.prefill()
 
     def _update_time_display(self):
         """更新时间显示"""
@@ -575,110 +781,66 @@ class FireSimulationUI(QtWidgets.QWidget):
 
     def _update_risk_display(self, time_step):
         """更新风险显示"""
-        if not self.risk_data or time_step >= len(self.risk_data):
+        if self.render_mode == "raster":
+            self._render_raster_frame(time_step)
             return
 
-        current_risk = self.risk_data[time_step]
-
-        # 更新每个方块的颜色
-        for row in range(self.chessboard.size):
-            for col in range(self.chessboard.size):
-                if row < len(current_risk) and col < len(current_risk[row]):
-                    risk_value = current_risk[row][col]
-                    square = self.chessboard.squares[row][col]
-
-                    # 根据状态设置颜色
-                    if self.chessboard.state_matrix[row][col] == 1:  # 墙体
-                        continue
-                    elif self.chessboard.state_matrix[row][col] == 2:  # 出口
-                        square.setBrush(QBrush(QColor(0, 255, 0)))  # 保持绿色
-                    elif self.chessboard.state_matrix[row][col] == 3:  # 起点
-                        square.setBrush(QBrush(QColor(255, 0, 255)))  # 保持粉色
-                    else:
-                        # 根据风险值设置颜色（绿到红）
-                        self._set_risk_color(square, risk_value)
-
-    def _set_risk_color(self, square, risk_value):
-        """根据风险值设置颜色"""
-        if risk_value <= 0:
-            # 安全 - 白色
-            square.setBrush(QBrush(QColor(255, 255, 255)))
-        else:
-            # 风险值0-0.9映射到绿色(0,255,0)到红色(255,0,0)
-            risk_value = min(0.9, max(0, risk_value))
-
-            # 线性插值
-            red = int(risk_value * 255 / 0.9)
-            green = int((0.9 - risk_value) * 255 / 0.9)
-            blue = 0
-
-            square.setBrush(QBrush(QColor(red, green, blue)))
-
-    def _update_route_display(self, time_step):
-        """更新路线显示"""
-        if not self.escape_routes:
+        if self.risk_data is None or time_step >= len(self.risk_data):
             return
+        self._paint_cells_frame(time_step)
 
-        # 路线颜色：蓝色、紫色、黄色
-        route_colors = [
-            QColor(0, 0, 255),  # 蓝色 - UCS
-            QColor(220, 120, 255),  # 紫色 - BFS
-            QColor(255, 255, 51)  # 黄色 - A*
-        ]
-
-        for route_idx, route in enumerate(self.escape_routes):
-            if not route:
-                continue
-
-            # 如果时间步超过路线长度，显示完整路径
-            # 否则按时间步显示路径
-            max_display_step = min(time_step + 1, len(route))
-            if time_step >= len(route) - 1:
-                max_display_step = len(route)
-
-            for i in range(max_display_step):
-                row, col = route[i]
-                if (0 <= row < self.chessboard.size and
-                        0 <= col < self.chessboard.size and
-                        self.chessboard.state_matrix[row][col] not in [1, 2, 3]):  # 不覆盖墙体、出口、起点
-                    square = self.chessboard.squares[row][col]
-                    square.setBrush(QBrush(route_colors[route_idx]))
+    def _update_route_display(self, time_step):
+        """更新路线显示（路线图层只追加或截短变化的部分）"""
+        self.route_overlay.update(self.escape_routes, time_step)
+
+    def _paint_cells_frame(self, time_step):
+        """方块模式：算出整盘目标颜色，只重绘颜色变化的方块"""
+        state = self.chessboard.cells
+        if self.risk_data is not None and time_step < len(self.risk_data):
+            rgb = risk_frame_to_rgb(self.risk_data[time_step], state)
+        else:
+            rgb = state_to_rgb(state)
+        self.cell_painter.paint(rgb)
 
     def on_back_clicked(self):
         """返回主菜单"""
-        # 保存当前状态（包含风险显示和路线）
-        current_matrix = self.chessboard.get_state_matrix()
-
+        # 保存当前状态（包含风险显示和路线），棋盘由共享模型保存
         # 保存风险和路线数据到interface_manager
+        # 风险数据为只读数组，直接共享而不深拷贝
         simulation_data = {
             'risk_data': self.risk_data,
-            'escape_routes': self.escape_routes,
+            'escape_routes': copy.deepcopy(self.escape_routes),
             'current_time_step': self.current_time_step,
-            'max_time_steps': self.max_time_steps
+            'max_time_steps': self.max_time_steps,
+            # 风险仍在流式计算时，离开后到达的帧由 _on_risk_progress 继续接收
+            'risk_stream_request': self._risk_stream_request
         }
-        self.interface_manager.set_simulation_data(copy.deepcopy(simulation_data))
-
-        self.interface_manager.set_board_data(copy.deepcopy(current_matrix))
+        self.interface_manager.set_simulation_data(simulation_data)
 
-        # 停止自动播放
-        if self.auto_play_timer.isActive():
-            self.auto_play_timer.stop()
+        # 停止自动播放和后台路线计算
+        self.playback.stop()
+        self.route_pool.cancel()
 
         self.interface_manager.show_main_menu()
 
     def load_board_data(self, matrix):
         """加载棋盘数据"""
-        if matrix and self.chessboard:
+        if matrix is not None and self.chessboard:
+            # 变化的格子通过模型信号触发 _on_board_changed
             self.chessboard.set_board_from_matrix(matrix)
             print("仿真界面棋盘数据已加载")
 
     def load_simulation_data(self, simulation_data):
         """加载模拟数据"""
         if simulation_data:
-            self.risk_data = simulation_data.get('risk_data')
+            # 保存的风险数据来自仍然有效的流式请求时，离开期间收到的帧更完整，不用旧的前缀覆盖
+            request = simulation_data.get('risk_stream_request')
+            if request is None or request != self.risk_stream.request_id:
+                self.risk_data = simulation_data.get('risk_data')
+                self.max_time_steps = simulation_data.get('max_time_steps', 0)
             self.escape_routes = simulation_data.get('escape_routes')
-            self.current_time_step = simulation_data.get('current_time_step', 0)
-            self.max_time_steps = simulation_data.get('max_time_steps', 0)
+            self.current_time_step = min(simulation_data.get('current_time_step', 0),
+                                         max(self.max_time_steps - 1, 0))
 
             # 更新UI
             if self.max_time_steps > 0:
@@ -688,10 +850,9 @@ class FireSimulationUI(QtWidgets.QWidget):
                 self._update_time_display()
 
                 # 更新风险和路线显示
-                if self.risk_data and self.current_time_step < len(self.risk_data):
+                if self.risk_data is not None and self.current_time_step < len(self.risk_data):
                     self._update_risk_display(self.current_time_step)
 
-                if self.escape_routes:
-                    self._update_route_display(self.current_time_step)
+                self._update_route_display(self.current_time_step)
 
             print("模拟数据已加载")
\ No newline at end of file
@@ -1,9 +1,8 @@
 from PyQt5 import QtCore, QtGui, QtWidgets
 from PyQt5.QtWidgets import QMessageBox
-from chessboard import InteractiveChessboard
+from chessboard import InteractiveChessboard, SHAPE_TOOLS
 import numpy as np
 from scipy import ndimage
-import copy
 
 
 class FloorPlanEditorUI(QtWidgets.QWidget):
@@ -44,7 +43,7 @@ class FloorPlanEditorUI(QtWidgets.QWidget):
         self.graphics_view.setGeometry(QtCore.QRect(40, 140, 500, 500))
 
         # 创建交互式棋盘
-        self.chessboard = InteractiveChessboard(self.graphics_view, size=32)
+        self.chessboard = InteractiveChessboard(self.graphics_view, model=self.interface_manager.board_model)
         # 初始状态下禁用交互，等待用户选择模式
         self.chessboard.set_interactive(False)
 
@@ -62,10 +61,27 @@ class FloorPlanEditorUI(QtWidgets.QWidget):
                 font-weight: bold;
             }
         """)
-        self.lb_tips.setText("对墙体和出口的编辑，左键摁住或拖动为增加，右键摁住或拖动为删除")
+        self.lb_tips.setText("对墙体和出口的编辑，左键摁住或拖动为增加，右键摁住或拖动为删除；"
+                             "直线/矩形拖动后松开生效，填充点击区域")
         self.lb_tips.setWordWrap(True)
         self.lb_tips.setAlignment(QtCore.Qt.AlignCenter)
 
+        # 编辑工具选择（与 SHAPE_TOOLS 顺序一致）
+        self.cb_tool = QtWidgets.QComboBox(self)
+        self.cb_tool.setGeometry(QtCore.QRect(610, 330, 280, 40))
+        self.cb_tool.addItems(["画笔", "直线", "矩形", "填充"])
+        self.cb_tool.setStyleSheet("""
+            QComboBox {
+                background-color: rgba(0, 255, 255, 64);
+                border: 1px solid rgba(0, 255, 255, 64);
+                border-radius: 12px;
+                color: white;
+                padding: 5px 15px;
+                font-size: 16px;
+                font-weight: bold;
+            }
+        """)
+
         # 按钮样式
         button_style_base = """
             QPushButton {{
@@ -110,6 +126,7 @@ class FloorPlanEditorUI(QtWidgets.QWidget):
         self.graphics_view.raise_()
         self.lb_title.raise_()
         self.lb_tips.raise_()
+        self.cb_tool.raise_()
         self.btn_edit_wall.raise_()
         self.btn_edit_output.raise_()
         self.btn_clear.raise_()
@@ -120,6 +137,7 @@ class FloorPlanEditorUI(QtWidgets.QWidget):
         self.btn_edit_output.clicked.connect(self.on_edit_output_clicked)
         self.btn_clear.clicked.connect(self.on_clear_clicked)  # 修改
         self.btn_back.clicked.connect(self.on_back_clicked)
+        self.cb_tool.currentIndexChanged.connect(self.on_tool_changed)
 
     def _setup_button_styles(self):
         """设置按钮样式"""
@@ -201,6 +219,11 @@ class FloorPlanEditorUI(QtWidgets.QWidget):
             }
         """)
 
+    def on_tool_changed(self, index):
+        """切换编辑工具"""
+        self.chessboard.set_shape_tool(SHAPE_TOOLS[index])
+        print(f"编辑工具: {SHAPE_TOOLS[index]}")
+
     def on_edit_wall_clicked(self):
         """编辑墙体模式"""
         if self.btn_edit_wall.isChecked():
@@ -243,8 +266,7 @@ class FloorPlanEditorUI(QtWidgets.QWidget):
             if reply == QMessageBox.No:
                 return
 
-        # 存储数据到interface_manager
-        self.interface_manager.set_board_data(copy.deepcopy(matrix))
+        # 编辑已直接写入共享棋盘模型，这里只需保存
         self._save_floor_plan_data(matrix)
 
         QMessageBox.information(self, '保存成功', '地图数据已成功保存！')
@@ -261,21 +283,17 @@ class FloorPlanEditorUI(QtWidgets.QWidget):
         )
         if reply == QMessageBox.Yes:
             self.chessboard.clear_board()
-            self.interface_manager.set_board_data(None)
             QMessageBox.information(self, '清空完成', '面板已清空！')
             print("面板已清空")
 
     def on_back_clicked(self):
         """返回主菜单"""
-        # 保存当前状态到interface_manager
-        current_matrix = self.chessboard.get_state_matrix()
-        self.interface_manager.set_board_data(copy.deepcopy(current_matrix))
-
+        # 棋盘模型由各界面共享，无需另外保存
         self.interface_manager.show_main_menu()
 
     def load_board_data(self, matrix):
         """加载棋盘数据"""
-        if matrix and self.chessboard:
+        if matrix is not None and self.chessboard:
             self.chessboard.set_board_from_matrix(matrix)
             print("棋盘数据已加载")
 
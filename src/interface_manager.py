@@ -1,4 +1,6 @@
 from PyQt5.QtWidgets import QWidget, QStackedWidget
+from board_model import BoardModel
+from predictor_service import PredictorService
 from main_menu_ui import MainMenuUI
 from floor_plan_editor_ui import FloorPlanEditorUI
 from fire_simulation_ui import FireSimulationUI
@@ -6,7 +8,7 @@ from fire_simulation_ui import FireSimulationUI
 class InterfaceManager:
     """界面管理器 - 控制不同界面之间的切换"""
 
-    def __init__(self, main_window):
+    def __init__(self, main_window, board_size=32, risk_dtype='float16'):
         self.main_window = main_window
         self.main_window.resize(1000, 750)
         self.main_window.setWindowTitle("Fire Escape System")
@@ -19,15 +21,20 @@ class InterfaceManager:
         self.interfaces = {}
         self.current_interface = None
 
-        # 存储棋盘数据
-        self.board_data = None
-        self.board_size = 32
+        # 三个界面共享的棋盘模型，各界面的棋盘都观察它的变化
+        self.board_size = board_size  # 棋盘边长（格），大于 64 时使用分块绘制
+        self.board_model = BoardModel(board_size)
+        # 风险模型在后台线程加载并预热，不阻塞界面，全程只加载一次
+        self.predictor_service = PredictorService(board_size)
 
         # 存储模拟数据
         self.simulation_data = None
+        # 风险序列的存储类型（float32 / float16 / uint8），见 RiskTensor
+        self.risk_dtype = risk_dtype
 
         # 初始化界面
         self._setup_interfaces()
+        self.predictor_service.start()
 
     def _setup_interfaces(self):
         """初始化所有界面"""
@@ -53,10 +60,6 @@ class InterfaceManager:
         #     self.save_board_data()
         self._switch_interface('main_menu')
 
-        # 更新主菜单中的棋盘显示
-        if self.board_data:
-            self.interfaces['main_menu'].update_board_display(self.board_data)
-
         # # 更新主菜单中的模拟显示
         # if self.simulation_data:
         #     self.interfaces['main_menu'].update_simulation_display(self.simulation_data)
@@ -65,17 +68,11 @@ class InterfaceManager:
         """显示地图编辑界面"""
         self._switch_interface('floor_plan_editor')
 
-        # 恢复之前保存的数据
-        if self.board_data:
-            self.interfaces['floor_plan_editor'].load_board_data(self.board_data)
-
     def show_fire_simulation_ui(self):
         """显示火灾模拟界面"""
         self._switch_interface('fire_simulation')
-
-        # 恢复之前保存的数据
-        if self.board_data:
-            self.interfaces['fire_simulation'].load_board_data(self.board_data)
+        # 之前加载失败时重新尝试
+        self.predictor_service.start()
 
         # 恢复之前的模拟数据
         if self.simulation_data:
@@ -88,20 +85,22 @@ class InterfaceManager:
             self.stacked_widget.setCurrentWidget(interface_widget)
             self.current_interface = interface_widget
 
+    @property
+    def board_data(self):
+        """当前棋盘的只读快照（写时复制，不拷贝数据）"""
+        return self.board_model.snapshot()
+
     def save_board_data(self):
-        """保存棋盘数据"""
-        if 'floor_plan_editor' in self.interfaces:
-            editor = self.interfaces['floor_plan_editor']
-            if hasattr(editor, 'chessboard'):
-                self.board_data = editor.chessboard.get_state_matrix()
+        """保存棋盘数据（编辑直接写入共享模型，无需复制）"""
 
     def get_board_data(self):
         """获取棋盘数据"""
         return self.board_data
 
     def set_board_data(self, data):
-        """设置棋盘数据"""
-        self.board_data = data
+        """设置棋盘数据；None 表示保持当前模型不变"""
+        if data is not None:
+            self.board_model.load(data)
 
     def set_simulation_data(self, data):
         """设置模拟数据"""
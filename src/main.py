@@ -1,15 +1,22 @@
 import sys
+import argparse
 from PyQt5.QtWidgets import QApplication, QMainWindow
 from interface_manager import InterfaceManager
+from risk_tensor import RISK_DTYPES
 
 
 def main():
     """主程序入口"""
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="Fire Escape System")
+    parser.add_argument("--board-size", type=int, default=32, help="棋盘边长（格），如 256 或 1024")
+    parser.add_argument("--risk-dtype", choices=RISK_DTYPES, default="float16",
+                        help="风险序列的存储类型：float16 误差 <= 4.9e-4，uint8 误差 <= 0.002")
+    args, qt_args = parser.parse_known_args()
+    app = QApplication(sys.argv[:1] + qt_args)
 
     # 创建主窗口和界面管理器
     main_window = QMainWindow()
-    interface_manager = InterfaceManager(main_window)
+    interface_manager = InterfaceManager(main_window, board_size=args.board_size, risk_dtype=args.risk_dtype)
 
     # 显示主菜单
     interface_manager.show_main_menu()
@@ -39,7 +39,7 @@ class MainMenuUI(QtWidgets.QWidget):
         self.graphics_view.setGeometry(QtCore.QRect(40, 140, 500, 500))
 
         # 创建静态网格显示
-        self.chessboard = InteractiveChessboard(self.graphics_view, size=32)
+        self.chessboard = InteractiveChessboard(self.graphics_view, model=self.interface_manager.board_model)
         # 禁用交互
         self.chessboard.set_interactive(False)
 
@@ -112,6 +112,6 @@ class MainMenuUI(QtWidgets.QWidget):
 
     def update_board_display(self, matrix):
         """更新棋盘显示"""
-        if matrix and self.chessboard:
+        if matrix is not None and self.chessboard:
             self.chessboard.set_board_from_matrix(matrix)
             print("主菜单棋盘显示已更新")
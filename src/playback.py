@@ -0,0 +1,145 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5 import QtCore
+from PyQt5.QtCore import pyqtSignal, QTimer
+
+# 两次调度之间至少留给事件循环的时间（毫秒），保证播放时界面仍能响应
+MIN_TICK_MS = 5
+
+
+class PlaybackScheduler(QtCore.QObject):
+    """
+    Plays time steps against the wall clock instead of a fixed-interval timer.
+
+    At speed 1.0 one step lasts `step_interval_ms`. Each tick emits frame_due for
+    the step the clock has reached, so when drawing a frame takes longer than a
+    step the next ticks jump ahead (frames are skipped) and playback keeps its
+    wall-clock speed. Only one tick is ever pending: the next one is scheduled
+    after the current frame has been drawn, so slow frames cannot pile up timer
+    events in the queue.
+
+    `prefetch(first, last)`, if given, runs on a background thread after each
+    frame to prepare the upcoming steps first..last.
+
+    While the steps are still streaming in, reaching the last available step
+    does not finish playback: the scheduler waits and resumes from there when
+    extend() brings more steps, until extend(..., streaming=False) marks the end.
+    """
+
+    SPEEDS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0)
+
+    frame_due = pyqtSignal(int)  # 需要显示的时间步
+    finished = pyqtSignal()
+
+    def __init__(self, step_interval_ms=100, prefetch=None, prefetch_frames=16, parent=None):
+        super().__init__(parent)
+        self.step_interval_ms = step_interval_ms
+        self.speed = 1.0
+        self.prefetch = prefetch
+        self.prefetch_frames = prefetch_frames
+
+        # 最近几帧绘制耗时的指数滑动平均（秒）
+        self.render_cost = 0.0
+        self.skipped_frames = 0
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._tick)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="frame-prefetch")
+        self._prefetch_future = None
+
+        self._anchor_step = 0
+        self._anchor_time = 0.0
+        self._current = 0
+        self._last = 0
+        # 后续帧仍在计算中；_waiting 表示已播到已有的最后一帧，正等待新帧
+        self._streaming = False
+        self._waiting = False
+
+        app = QtCore.QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.shutdown)
+
+    def start(self, first, last, streaming=False):
+        """
+        Play steps first..last (inclusive), showing `first` immediately.
+
+        :param streaming: more steps will arrive through extend()
+        """
+        self.stop()
+        self._last = last
+        self._streaming = streaming
+        self._current = first - 1
+        self._anchor_step, self._anchor_time = first, time.perf_counter()
+        self.skipped_frames = 0
+        self._tick()
+
+    def stop(self):
+        self._timer.stop()
+        self._waiting = False
+
+    def is_active(self):
+        return self._timer.isActive() or self._waiting
+
+    def extend(self, last, streaming=True):
+        """
+        More steps became available: keep playing up to `last`.
+
+        :param streaming: False when `last` is the final step of the stream
+        """
+        self._last = max(self._last, last)
+        self._streaming = streaming
+        if self._waiting:
+            # 从等待的那一帧重新开始计时，而不是一下跳过等待期间“应播放”的帧
+            self._waiting = False
+            self._anchor_step, self._anchor_time = self._current, time.perf_counter()
+            self._tick()
+
+    def set_speed(self, speed):
+        """Change the speed (one of SPEEDS) without jumping: the clock restarts at the current step."""
+        if speed not in self.SPEEDS:
+            raise ValueError(f"speed must be one of {self.SPEEDS}")
+        self._anchor_step, self._anchor_time = max(self._current, self._anchor_step), time.perf_counter()
+        self.speed = speed
+
+    @property
+    def step_duration(self):
+        """Wall-clock duration of one step at the current speed, in seconds."""
+        return self.step_interval_ms / 1000 / self.speed
+
+    def _tick(self):
+        now = time.perf_counter()
+        target = min(self._anchor_step + int((now - self._anchor_time) / self.step_duration), self._last)
+        if target > self._current:
+            self.skipped_frames += target - self._current - 1
+            self._current = target
+
+            started = time.perf_counter()
+            self.frame_due.emit(target)
+            cost = time.perf_counter() - started
+            self.render_cost = cost if self.render_cost == 0 else 0.8 * self.render_cost + 0.2 * cost
+            self._request_prefetch(target)
+
+        if self._current >= self._last:
+            if self._streaming:
+                self._waiting = True
+                return
+            self.finished.emit()
+            return
+
+        # 下一步到达的时刻；绘制比一步还慢时按绘制耗时调度，中间的帧会被跳过
+        next_time = self._anchor_time + (self._current + 1 - self._anchor_step) * self.step_duration
+        delay = max(next_time - time.perf_counter(), self.render_cost, 0) * 1000
+        self._timer.start(max(int(delay), MIN_TICK_MS))
+
+    def _request_prefetch(self, step):
+        if self.prefetch is None or step >= self._last:
+            return
+        if self._prefetch_future is not None and not self._prefetch_future.done():
+            return
+        last = min(step + self.prefetch_frames, self._last)
+        self._prefetch_future = self._executor.submit(self.prefetch, step + 1, last)
+
+    def shutdown(self):
+        self.stop()
+        self._executor.shutdown(wait=False)
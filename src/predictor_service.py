@@ -0,0 +1,198 @@
+import threading
+import time
+import numpy as np
+from PyQt5 import QtCore
+from PyQt5.QtCore import pyqtSignal
+from risk_cache import RiskTensorCache
+
+MODEL_PATH = 'smoke_risk_model_complete.pth'
+
+
+def _load_smoke_predictor(model_path):
+    # 延迟导入：模型依赖（torch 等）只在后台线程里加载
+    from model_definitions import SmokeRiskPredictor
+    return SmokeRiskPredictor(model_path=model_path)
+
+
+def predict_batch(predictor, floor_plans, batch_size=8, out=None) -> np.ndarray:
+    """
+    Predict N floor plans into one float32 [N, T, H, W] array.
+
+    Plans are handed to the predictor's own `predict_batch` (one forward pass
+    per `batch_size` plans) when it has one; otherwise each plan goes through
+    `predict`. Either way results are written straight into the preallocated
+    output instead of being collected in a list and stacked.
+
+    :param floor_plans: [N, H, W] float32 plans (walls 1, everything else 0)
+    :param out: optional preallocated [N, T, H, W] array
+    :return: `out`; for N = 0 without `out`, an empty [0, 0, H, W] array (T is unknown)
+    """
+    plans = np.asarray(floor_plans, dtype=np.float32)
+    if len(plans) == 0:
+        return np.empty((0, 0) + plans.shape[1:], dtype=np.float32) if out is None else out
+    batched = getattr(predictor, 'predict_batch', None)
+    for start in range(0, len(plans), batch_size):
+        stop = min(start + batch_size, len(plans))
+        if batched is not None:
+            block = np.asarray(batched(plans[start:stop]), dtype=np.float32)
+        else:
+            block = [np.asarray(predictor.predict(plan), dtype=np.float32) for plan in plans[start:stop]]
+        if out is None:
+            # 第一批结果确定时间步数 T
+            out = np.empty((len(plans),) + np.shape(block[0]), dtype=np.float32)
+        for offset, risk in enumerate(block):
+            out[start + offset] = risk
+    return out
+
+
+class PredictorService(QtCore.QObject):
+    """
+    Loads the smoke risk model on a background thread and keeps the single
+    instance shared by every screen.
+
+    After loading, one prediction on an empty board of the current size is run
+    as warm-up, so the first real calculation does not pay for lazy
+    initialisation or a cold inference. status_changed reports progress to the
+    GUI thread; predictor() returns the instance once it is ready.
+
+    Predictions go through an on-disk RiskTensorCache, so a floor plan seen
+    before (with the same model file) is available even before the model loads.
+    """
+
+    LOADING, READY, FAILED = 'loading', 'ready', 'failed'
+
+    status_changed = pyqtSignal(str, str)  # 状态, 说明文字
+
+    def __init__(self, board_size, model_path=MODEL_PATH, loader=_load_smoke_predictor, cache=None, parent=None):
+        super().__init__(parent)
+        self.board_size = board_size
+        self.model_path = model_path
+        self.loader = loader
+        self.cache = RiskTensorCache() if cache is None else cache
+        self.status = None
+        self.message = ''
+        self.error = None
+        # 模型文件摘要：由后台加载线程计算，GUI 线程查缓存时只需对地图求摘要
+        self.model_digest = None
+        self._predictor = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start loading in the background; no-op while loading or once ready."""
+        with self._lock:
+            if self.status in (self.LOADING, self.READY):
+                return
+            self.error = None
+            self._set_status(self.LOADING, "风险模型加载中...")
+            self._thread = threading.Thread(target=self._load, name="predictor-load", daemon=True)
+            self._thread.start()
+
+    def _load(self):
+        try:
+            # 先于加载模型计算：模型加载期间已缓存的地图即可命中
+            self.model_digest = self.cache.model_digest(self.model_path)
+        except OSError:
+            # 模型文件不存在时不使用磁盘缓存
+            self.model_digest = None
+        try:
+            started = time.perf_counter()
+            predictor = self.loader(self.model_path)
+            loaded = time.perf_counter()
+            self._set_status(self.LOADING, "风险模型预热中...")
+            predictor.predict(np.zeros((self.board_size, self.board_size), dtype=np.float32))
+            warmed = time.perf_counter()
+        except Exception as e:
+            with self._lock:
+                self.error = e
+                self._set_status(self.FAILED, f"风险模型加载失败: {e}")
+            return
+        print(f"模型加载 {loaded - started:.2f}s，预热 {warmed - loaded:.2f}s")
+        with self._lock:
+            self._predictor = predictor
+            self._set_status(self.READY, "风险模型已就绪")
+
+    def _set_status(self, status, message):
+        self.status, self.message = status, message
+        self.status_changed.emit(status, message)
+
+    def is_ready(self):
+        return self.status == self.READY
+
+    def predictor(self):
+        """The loaded predictor, or None while it is loading or after a failure (see `error`)."""
+        return self._predictor
+
+    def _ready_predictor(self):
+        """The loaded predictor; RuntimeError while it is loading or after a failure."""
+        predictor = self._predictor
+        if predictor is None:
+            if self.status == self.FAILED:
+                raise RuntimeError(f"smoke risk model failed to load: {self.error}")
+            raise RuntimeError("smoke risk model is not loaded yet")
+        return predictor
+
+    def lookup(self, floor_plan):
+        """Cached prediction for `floor_plan` (read-only memmap [T, H, W]), or None (also before the model file is hashed)."""
+        return self.cache.get(self._key(floor_plan))
+
+    def _key(self, floor_plan):
+        """Cache key of `floor_plan`; None until the loader has hashed the model file."""
+        return self.cache.make_key(floor_plan, self.model_digest)
+
+    def predict(self, floor_plan):
+        """Cached prediction, or run the loaded model and cache its output."""
+        key = self._key(floor_plan)
+        risk = self.cache.get(key)
+        if risk is None:
+            risk = np.asarray(self._ready_predictor().predict(floor_plan), dtype=np.float32)
+            self.cache.put(key, risk)
+        return risk
+
+    def predict_stream(self, floor_plan):
+        """
+        Yield the predicted frames [H, W] one at a time and cache the whole
+        sequence at the end. Uses the model's own `predict_stream` when it has
+        one; otherwise the frames of a full `predict` are yielded.
+        """
+        key = self._key(floor_plan)
+        predictor = self._ready_predictor()
+        stream = getattr(predictor, 'predict_stream', None)
+        if stream is None:
+            risk = np.asarray(predictor.predict(floor_plan), dtype=np.float32)
+            yield from risk
+        else:
+            frames = []
+            for frame in stream(floor_plan):
+                frame = np.asarray(frame, dtype=np.float32)
+                frames.append(frame)
+                yield frame
+            risk = np.stack(frames)
+        self.cache.put(key, risk)
+
+    def predict_batch(self, floor_plans, batch_size=8):
+        """
+        Predict N floor plans into float32 [N, T, H, W]; cached plans are read
+        from disk and only the others go to the model, in batches.
+
+        Raises RuntimeError if some plan is not cached and the model is not ready.
+        """
+        plans = np.asarray(floor_plans, dtype=np.float32)
+        if len(plans) == 0:
+            return predict_batch(None, plans)
+        keys = [self._key(plan) for plan in plans]
+        cached = [self.cache.get(key) for key in keys]
+        missing = [idx for idx, risk in enumerate(cached) if risk is None]
+        predicted = predict_batch(self._ready_predictor(), plans[missing], batch_size) if missing else None
+        if len(missing) == len(plans):
+            for idx in missing:
+                self.cache.put(keys[idx], predicted[idx])
+            return predicted
+        for offset, idx in enumerate(missing):
+            self.cache.put(keys[idx], predicted[offset])
+            cached[idx] = predicted[offset]
+
+        out = np.empty((len(plans),) + cached[0].shape, dtype=np.float32)
+        for idx, risk in enumerate(cached):
+            out[idx] = risk
+        return out
@@ -0,0 +1,123 @@
+import hashlib
+import os
+import threading
+import numpy as np
+from route_cache import array_digest
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "fire_escape_system", "risk")
+DEFAULT_MAX_BYTES = 2 * 2 ** 30
+
+
+def file_digest(path, chunk_size=2 ** 20) -> str:
+    """Content hash of a file (e.g. the model weights)."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+class RiskTensorCache:
+    """
+    On-disk cache of predicted risk tensors, one .npy file per entry.
+
+    Keys hash the floor plan together with the model file's content, so a new
+    model never serves stale predictions. Entries are read back memory-mapped
+    and read-only. Reading an entry touches its mtime; when the directory
+    grows past `max_bytes` the entries with the oldest mtime are deleted (LRU).
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # 模型文件摘要备忘：(路径, 大小, 修改时间) 不变时不重新读取整个文件
+        self._model_digests = {}
+
+    def model_digest(self, model_path):
+        """
+        Content hash of the model file, remembered per (path, size, mtime).
+        Reads the whole file the first time, so call it off the GUI thread.
+
+        :raises OSError: if the model file is missing or unreadable
+        """
+        stat = os.stat(model_path)
+        key = (os.path.abspath(model_path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            digest = self._model_digests.get(key)
+        if digest is None:
+            digest = file_digest(model_path)
+            with self._lock:
+                self._model_digests[key] = digest
+        return digest
+
+    def make_key(self, floor_plan, model_digest):
+        """
+        Cache key of a plan under the model with digest `model_digest`
+        (see model_digest()); None when the digest is None (no model file).
+        Only the floor plan is hashed here.
+        """
+        if model_digest is None:
+            return None
+        return hashlib.blake2b(f"{array_digest(floor_plan, dtype=np.float32)}:{model_digest}".encode(),
+                               digest_size=16).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npy")
+
+    def get(self, key):
+        """The cached tensor as a read-only memmap, or None."""
+        if key is None:
+            return None
+        path = self._path(key)
+        try:
+            risk = np.load(path, mmap_mode='r')
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        # GUI 线程的查找与后台预测线程可能同时读取缓存
+        with self._lock:
+            self.hits += 1
+        return risk
+
+    def put(self, key, risk):
+        """Store a tensor (written atomically), then evict old entries over the size cap."""
+        if key is None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, 'wb') as f:
+                np.save(f, np.asarray(risk))
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"风险缓存写入失败: {e}")
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        self.evict(keep=path)
+
+    def evict(self, keep=None):
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith('.npy'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
@@ -0,0 +1,324 @@
+import threading
+import numpy as np
+from collections import OrderedDict
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage, QPixmap, QColor, QBrush
+from PyQt5.QtWidgets import QGraphicsPixmapItem
+from chessboard import GridItem
+
+# 风险值 0-0.9 映射到绿色 (0,255,0) 到红色 (255,0,0)，与 _set_risk_color 一致
+RISK_MAX = 0.9
+SAFE_COLOR = (255, 255, 255)
+# 墙体 / 出口 / 起点保持各自的颜色
+STATE_COLORS = {
+    1: (0, 0, 0),
+    2: (0, 255, 0),
+    3: (255, 0, 255),
+}
+# 颜色查找表的精度：风险值量化为 LUT_SIZE 级，最后一项留给安全（白色）
+LUT_SIZE = 1024
+# 路线颜色：蓝色 - UCS，紫色 - BFS，黄色 - A*
+ROUTE_COLORS = [
+    (0, 0, 255),
+    (220, 120, 255),
+    (255, 255, 51),
+]
+
+
+def risk_frame_to_rgb(risk_frame, state_matrix) -> np.ndarray:
+    """
+    Convert one [H, W] risk frame into an [H, W, 3] uint8 RGB image, vectorized.
+
+    Cells with risk <= 0 or NaN are white, walls/exits/start keep their state colours.
+    """
+    risk = np.nan_to_num(np.asarray(risk_frame, dtype=np.float64), nan=0.0)
+    state = np.asarray(state_matrix)
+    value = np.clip(risk, 0, RISK_MAX)
+
+    rgb = np.empty(risk.shape + (3,), dtype=np.uint8)
+    rgb[..., 0] = (value * 255 / RISK_MAX).astype(np.uint8)
+    rgb[..., 1] = ((RISK_MAX - value) * 255 / RISK_MAX).astype(np.uint8)
+    rgb[..., 2] = 0
+    rgb[risk <= 0] = SAFE_COLOR
+    for code, color in STATE_COLORS.items():
+        rgb[state == code] = color
+    return rgb
+
+
+def state_to_rgb(state_matrix) -> np.ndarray:
+    """[H, W, 3] uint8 image of the bare board: white floor plus the state colours."""
+    state = np.asarray(state_matrix)
+    rgb = np.empty(state.shape + (3,), dtype=np.uint8)
+    rgb[...] = SAFE_COLOR
+    for code, color in STATE_COLORS.items():
+        rgb[state == code] = color
+    return rgb
+
+
+def pack_rgb(rgb) -> np.ndarray:
+    """Pack an [..., 3] uint8 image into [...] uint32 0xRRGGBB values for cheap comparisons."""
+    rgb = np.asarray(rgb, dtype=np.uint32)
+    return (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]
+
+
+def build_risk_lut(size=LUT_SIZE) -> np.ndarray:
+    """
+    [size + 1, 3] uint8 colour lookup table. Entry k < size is the colour of
+    risk k / (size - 1) * RISK_MAX; the extra last entry is the safe colour.
+    """
+    value = np.linspace(0, RISK_MAX, size)
+    lut = np.empty((size + 1, 3), dtype=np.uint8)
+    lut[:size, 0] = (value * 255 / RISK_MAX).astype(np.uint8)
+    lut[:size, 1] = ((RISK_MAX - value) * 255 / RISK_MAX).astype(np.uint8)
+    lut[:size, 2] = 0
+    lut[size] = SAFE_COLOR
+    return lut
+
+
+def risk_frames_to_rgb(risk_frames, state_matrix, lut) -> np.ndarray:
+    """
+    Convert a [N, H, W] block of risk frames into [N, H, W, 3] uint8 images with
+    one vectorized LUT gather. Quantization error is at most half a LUT step
+    (RISK_MAX / (2 * (LUT_SIZE - 1)) in risk), i.e. at most one colour level per channel.
+    NaN risk (e.g. from a bad model output) is drawn as safe.
+    """
+    # NaN 经 rint 转整数会变成 INT_MIN，查表越界；按 0 处理
+    risk = np.nan_to_num(np.asarray(risk_frames), nan=0.0)
+    size = len(lut) - 1
+    index = np.rint(np.clip(risk, 0, RISK_MAX) * ((size - 1) / RISK_MAX)).astype(np.intp)
+    index[risk <= 0] = size
+    rgb = lut[index]
+
+    state = np.asarray(state_matrix)
+    for code, color in STATE_COLORS.items():
+        rgb[:, state == code] = color
+    return rgb
+
+
+def paint_routes(rgb, routes, time_step, state_matrix):
+    """
+    Paint the route prefixes visible at `time_step` into `rgb` in place,
+    without covering walls, exits or the start.
+    """
+    state = np.asarray(state_matrix)
+    rows, cols = state.shape
+    for route_idx, route in enumerate(routes):
+        if not route:
+            continue
+        cells = np.asarray(route[:min(time_step + 1, len(route))], dtype=np.intp).reshape(-1, 2)
+        r, c = cells[:, 0], cells[:, 1]
+        inside = (r >= 0) & (r < rows) & (c >= 0) & (c < cols)
+        r, c = r[inside], c[inside]
+        free = ~np.isin(state[r, c], (1, 2, 3))
+        rgb[r[free], c[free]] = ROUTE_COLORS[route_idx]
+    return rgb
+
+
+def rgb_to_qimage(rgb) -> QImage:
+    """Wrap an [H, W, 3] uint8 array as a QImage that owns a copy of the pixels."""
+    rgb = np.ascontiguousarray(rgb)
+    height, width = rgb.shape[:2]
+    image = QImage(rgb.data, width, height, rgb.strides[0], QImage.Format_RGB888)
+    return image.copy()
+
+
+class CellDiffPainter:
+    """
+    Paints full-board colour images onto the board's ChessboardSquares, but only
+    calls setBrush on squares whose colour differs from what they already show.
+    Consecutive risk frames differ in few cells, so a time step costs about
+    as much as the number of cells that changed colour.
+    """
+
+    def __init__(self, chessboard):
+        self.chessboard = chessboard
+        # painted[r, c]：方块当前显示的颜色（0xRRGGBB）；None 表示未知，下次整盘重绘
+        self.painted = None
+        self._brushes = {}
+
+    def invalidate(self):
+        """Squares were repainted elsewhere (e.g. set_state); repaint everything next time."""
+        self.painted = None
+
+    def _brush(self, color):
+        brush = self._brushes.get(color)
+        if brush is None:
+            brush = self._brushes[color] = QBrush(QColor((color >> 16) & 0xFF, (color >> 8) & 0xFF, color & 0xFF))
+        return brush
+
+    def paint(self, rgb) -> int:
+        """
+        :param rgb: [H, W, 3] uint8 target colours of the whole board
+        :return: number of squares repainted
+        """
+        target = pack_rgb(rgb)
+        if self.painted is None or self.painted.shape != target.shape:
+            rows, cols = np.indices(target.shape)
+            rows, cols = rows.ravel(), cols.ravel()
+        else:
+            rows, cols = np.nonzero(target != self.painted)
+
+        squares = self.chessboard.squares
+        for row, col, color in zip(rows.tolist(), cols.tolist(), target[rows, cols].tolist()):
+            squares[row][col].setBrush(self._brush(color))
+        self.painted = target
+        return len(rows)
+
+
+class FrameCache:
+    """Bounded LRU cache of rendered frames (QImage), limited by total bytes."""
+
+    def __init__(self, max_bytes=256 * 2 ** 20):
+        self.max_bytes = max_bytes
+        self._frames = OrderedDict()
+        self.total_bytes = 0
+
+    def __contains__(self, time_step):
+        return time_step in self._frames
+
+    def __len__(self):
+        return len(self._frames)
+
+    def get(self, time_step):
+        image = self._frames.get(time_step)
+        if image is not None:
+            self._frames.move_to_end(time_step)
+        return image
+
+    def put(self, time_step, image):
+        if time_step in self._frames:
+            self.total_bytes -= self._frames.pop(time_step).byteCount()
+        self._frames[time_step] = image
+        self.total_bytes += image.byteCount()
+        while self.total_bytes > self.max_bytes and len(self._frames) > 1:
+            _, evicted = self._frames.popitem(last=False)
+            self.total_bytes -= evicted.byteCount()
+
+    def is_full(self, next_frame_bytes=0):
+        return self.total_bytes + next_frame_bytes > self.max_bytes
+
+    def clear(self):
+        self._frames.clear()
+        self.total_bytes = 0
+
+
+class RiskFrameRenderer:
+    """
+    Turns a whole risk sequence into ready-to-blit QImages through a colour LUT
+    and keeps them in a bounded FrameCache, so showing frame t is a cache lookup.
+    Frames evicted from the cache are re-rendered on demand.
+
+    prefetch() may run on a worker thread while the GUI thread calls frame().
+    """
+
+    def __init__(self, max_bytes=256 * 2 ** 20, chunk_frames=16):
+        self.lut = build_risk_lut()
+        self.cache = FrameCache(max_bytes)
+        self.chunk_frames = chunk_frames
+        self.risk = None
+        self.state = None
+        self._lock = threading.Lock()
+        # 每次更换序列或棋盘状态加一，后台预取的过期结果据此丢弃
+        self._generation = 0
+
+    def set_sequence(self, risk, state_matrix):
+        """Use a new risk sequence [T, H, W]; drops all cached frames."""
+        with self._lock:
+            self.risk = risk
+            self.state = np.array(state_matrix, dtype=np.int8)
+            self.cache.clear()
+            self._generation += 1
+
+    def extend_sequence(self, risk):
+        """Switch to a longer sequence that starts with the current frames; cached frames stay valid."""
+        with self._lock:
+            self.risk = risk
+
+    def set_state(self, state_matrix):
+        """Board states (walls/exits/start) are baked into frames, so changes drop the cache."""
+        state = np.array(state_matrix, dtype=np.int8)
+        with self._lock:
+            if self.state is not None and np.array_equal(state, self.state):
+                return
+            self.state = state
+            self.cache.clear()
+            self._generation += 1
+
+    def _render(self, t0, t1):
+        """Render frames t0..t1-1 outside the lock and cache them; returns the images."""
+        with self._lock:
+            risk, state, generation = self.risk, self.state, self._generation
+        rgb = risk_frames_to_rgb(risk[t0:t1], state, self.lut)
+        images = [rgb_to_qimage(frame) for frame in rgb]
+        with self._lock:
+            if generation == self._generation:
+                for offset, image in enumerate(images):
+                    self.cache.put(t0 + offset, image)
+        return images
+
+    def prefill(self, start=0):
+        """Render frames from `start` onwards in vectorized chunks until the cache is full."""
+        if self.risk is None:
+            return
+        frame_bytes = self.state.size * 3
+        t = start
+        while t < len(self.risk) and not self.cache.is_full(frame_bytes * self.chunk_frames):
+            t1 = min(t + self.chunk_frames, len(self.risk))
+            self._render(t, t1)
+            t = t1
+
+    def prefetch(self, first, last):
+        """Render the frames first..last that are not cached yet (safe on a worker thread)."""
+        with self._lock:
+            if self.risk is None:
+                return
+            missing = [t for t in range(first, min(last + 1, len(self.risk))) if t not in self.cache]
+        if missing:
+            self._render(missing[0], missing[-1] + 1)
+
+    def frame(self, time_step):
+        """QImage of `time_step`, rendered now if it is not cached."""
+        with self._lock:
+            image = self.cache.get(time_step)
+        if image is None:
+            image = self._render(time_step, time_step + 1)[0]
+        return image
+
+
+class RasterRiskLayer:
+    """
+    Draws a whole risk frame as one pixmap item on top of the board's cells,
+    with a thin grid overlay above it. Both items ignore mouse buttons so
+    clicks still reach the board underneath.
+    """
+
+    def __init__(self, chessboard):
+        self.chessboard = chessboard
+        scene = chessboard.scene
+        cell = chessboard.square_size
+
+        self.pixmap_item = QGraphicsPixmapItem()
+        self.pixmap_item.setTransformationMode(Qt.FastTransformation)
+        self.pixmap_item.setScale(cell)
+        self.pixmap_item.setZValue(1)
+        self.pixmap_item.setAcceptedMouseButtons(Qt.NoButton)
+        scene.addItem(self.pixmap_item)
+
+        # 网格线只画可见区域，缩小到看不清时不画
+        self.grid_item = GridItem(chessboard.size, cell)
+        self.grid_item.setZValue(2)
+        scene.addItem(self.grid_item)
+
+        self.hide()
+
+    def show_image(self, image):
+        self.pixmap_item.setPixmap(QPixmap.fromImage(image))
+        self.pixmap_item.setVisible(True)
+        self.grid_item.setVisible(True)
+
+    def hide(self):
+        self.pixmap_item.setVisible(False)
+        self.grid_item.setVisible(False)
+
+    def is_visible(self):
+        return self.pixmap_item.isVisible()
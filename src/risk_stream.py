@@ -0,0 +1,106 @@
+import threading
+import time
+import numpy as np
+from PyQt5 import QtCore
+from PyQt5.QtCore import pyqtSignal
+from risk_tensor import RiskTensor, quantize, uint8_scale
+
+# 两次进度信号之间的最短间隔（秒），避免逐帧信号挤满事件队列
+PROGRESS_INTERVAL = 0.03
+
+
+class RiskStream(QtCore.QObject):
+    """
+    Collects a risk sequence produced frame by frame on a background thread.
+
+    Frames are encoded into a growing [T, H, W] buffer of the requested storage
+    type (see RiskTensor; uint8 covers [0, 1]). prefix() returns a RiskTensor
+    over the frames received so far; a frame never changes once
+    written, and a full buffer is replaced by a larger copy rather than
+    modified, so views handed out earlier stay valid. progress carries the
+    number of ready frames; only the newest request's signals are emitted.
+    """
+
+    progress = pyqtSignal(int, int)   # 请求编号, 已就绪帧数
+    finished = pyqtSignal(int, int)   # 请求编号, 总帧数
+    failed = pyqtSignal(int, str)     # 请求编号, 错误信息
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.request_id = 0
+        self._lock = threading.Lock()
+        self._buffer = None
+        self._ready = 0
+        self._scale = 1.0
+        self._running = False
+
+    def start(self, frames, shape, time_steps_hint=64, dtype='float32'):
+        """
+        Consume `frames` (an iterable of [H, W] arrays) on a worker thread; a
+        running request is abandoned.
+
+        :return: the new request id
+        """
+        with self._lock:
+            self.request_id += 1
+            request_id = self.request_id
+            self._buffer = np.empty((max(time_steps_hint, 1),) + tuple(shape), dtype=dtype)
+            self._scale = uint8_scale() if self._buffer.dtype == np.uint8 else 1.0
+            self._ready = 0
+            self._running = True
+        threading.Thread(target=self._run, args=(request_id, frames), name="risk-stream", daemon=True).start()
+        return request_id
+
+    def cancel(self):
+        """Abandon the running request; it stops at its next frame."""
+        with self._lock:
+            self.request_id += 1
+            self._running = False
+
+    def is_running(self):
+        """True while the newest request is still producing frames."""
+        return self._running
+
+    def prefix(self) -> RiskTensor:
+        """RiskTensor [ready, H, W] sharing the storage of the frames received so far."""
+        with self._lock:
+            if self._buffer is None:
+                return None
+            return RiskTensor(self._buffer[:self._ready], self._scale)
+
+    def _run(self, request_id, frames):
+        last_emit = 0.0
+        try:
+            for frame in frames:
+                frame = quantize(frame, self._buffer.dtype, self._scale)
+                with self._lock:
+                    if request_id != self.request_id:
+                        return
+                    if self._ready == len(self._buffer):
+                        # 缓冲区已满：换成两倍大小的新数组，旧数组上的视图保持不变
+                        grown = np.empty((2 * len(self._buffer),) + self._buffer.shape[1:], dtype=self._buffer.dtype)
+                        grown[:self._ready] = self._buffer
+                        self._buffer = grown
+                    self._buffer[self._ready] = frame
+                    self._ready += 1
+                    ready = self._ready
+                now = time.perf_counter()
+                if ready == 1 or now - last_emit >= PROGRESS_INTERVAL:
+                    last_emit = now
+                    self.progress.emit(request_id, ready)
+        except Exception as e:
+            with self._lock:
+                if request_id != self.request_id:
+                    return
+                self._running = False
+            self.failed.emit(request_id, str(e))
+            return
+        with self._lock:
+            if request_id != self.request_id:
+                return
+            self._running = False
+            # 收缩到实际帧数
+            self._buffer = self._buffer[:self._ready]
+            ready = self._ready
+        self.progress.emit(request_id, ready)
+        self.finished.emit(request_id, ready)
@@ -0,0 +1,117 @@
+import numpy as np
+
+# 可选的存储类型
+RISK_DTYPES = ('float32', 'float16', 'uint8')
+# uint8 量化的默认上限：风险 / 烟雾浓度的取值范围为 [0, 1]
+UINT8_MAX_VALUE = 1.0
+
+
+def uint8_scale(max_value=UINT8_MAX_VALUE) -> float:
+    """Scale of uint8 storage covering [0, max_value]: value = q * scale."""
+    return float(max_value) / 255 if max_value > 0 else 1.0
+
+
+def quantize(values, dtype, scale=1.0) -> np.ndarray:
+    """Encode float risk values for storage as `dtype` (uint8 values are round(value / scale), clipped to 0..255)."""
+    values = np.asarray(values)
+    if np.dtype(dtype) == np.uint8:
+        return np.rint(np.clip(values / np.float32(scale), 0, 255)).astype(np.uint8)
+    return values.astype(dtype, copy=False)
+
+
+class RiskTensor:
+    """
+    Compact read-only risk sequence [T, H, W] with a pluggable storage type.
+
+    - float32: exact.
+    - float16: relative error <= 2**-11, i.e. <= 4.9e-4 absolute for values in
+      [0, 1] (below the renderer's colour step of 0.9 / 1023).
+    - uint8: value = q * scale with q in 0..255; absolute error <= scale / 2,
+      i.e. <= 0.002 for the default range [0, 1]. Values outside
+      [0, 255 * scale] are clipped.
+
+    Indexing (risk[t], risk[t0:t1]) decodes only the requested frames to
+    float32, so the renderer reads it like an array. Route searches read the
+    stored values directly through `data` and `scale` (see time_expanded_graph).
+    """
+
+    def __init__(self, data, scale=1.0):
+        """Wrap already encoded storage without copying."""
+        data = np.asarray(data)
+        if data.dtype.name not in RISK_DTYPES:
+            raise ValueError(f"risk storage dtype must be one of {RISK_DTYPES}, got {data.dtype}")
+        if data.ndim != 3:
+            raise ValueError("risk storage must be [T, H, W]")
+        self.data = data.view()
+        self.data.flags.writeable = False
+        self.scale = float(scale) if data.dtype == np.uint8 else 1.0
+
+    @classmethod
+    def encode(cls, risk, dtype='float16', max_value=None, chunk_frames=16) -> 'RiskTensor':
+        """
+        Encode a [T, H, W] risk sequence (ndarray, memmap or RiskTensor), chunk by
+        chunk so no full-size float temporary is made.
+
+        :param max_value: upper end of the uint8 range; None uses the data maximum
+        """
+        dtype = np.dtype(dtype)
+        if isinstance(risk, RiskTensor):
+            if risk.dtype == dtype and max_value is None:
+                return risk
+        else:
+            risk = np.asarray(risk)
+            if risk.dtype == dtype == np.float32:
+                # 已是 float32（包括内存映射的缓存文件）：直接包装，不复制
+                return cls(risk)
+        scale = 1.0
+        if dtype == np.uint8:
+            if max_value is None:
+                max_value = max((float(risk[t0:t0 + chunk_frames].max())
+                                 for t0 in range(0, len(risk), chunk_frames)), default=0.0)
+            scale = uint8_scale(max_value)
+        data = np.empty(risk.shape, dtype=dtype)
+        for t0 in range(0, len(risk), chunk_frames):
+            data[t0:t0 + chunk_frames] = quantize(risk[t0:t0 + chunk_frames], dtype, scale)
+        return cls(data, scale)
+
+    @property
+    def dtype(self):
+        return self.data.dtype
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    @property
+    def ndim(self):
+        return 3
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+    @property
+    def max_error(self) -> float:
+        """Bound of |decoded - original| for values in [0, 1] (uint8: in [0, 255 * scale])."""
+        if self.dtype == np.uint8:
+            return self.scale / 2
+        if self.dtype == np.float16:
+            return 2.0 ** -11
+        return 0.0
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index) -> np.ndarray:
+        values = self.data[index]
+        if self.dtype == np.uint8:
+            return values.astype(np.float32) * np.float32(self.scale)
+        return values.astype(np.float32, copy=False)
+
+    def __array__(self, dtype=None, copy=None):
+        values = self[:]
+        return values if dtype is None else values.astype(dtype)
+
+    def prefix(self, length) -> 'RiskTensor':
+        """The first `length` frames, sharing storage."""
+        return RiskTensor(self.data[:length], self.scale)
@@ -0,0 +1,110 @@
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+from risk_tensor import RiskTensor
+
+# 区分“缓存了无路径结果”与“未命中”
+_NO_ROUTE = object()
+
+
+def array_digest(data, dtype=None) -> str:
+    """Content hash of an array-like (shape, dtype and bytes)."""
+    arr = np.ascontiguousarray(np.asarray(data, dtype=dtype))
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str((arr.shape, arr.dtype.str)).encode())
+    h.update(arr.data)
+    return h.hexdigest()
+
+
+class RouteCache:
+    """
+    Content-hashed LRU cache of route search results.
+
+    Keys combine the floor plan, the risk tensor, the start cell, the algorithm
+    and its parameters (weights / danger_threshold), so a repeated query with the
+    same inputs returns the stored (cost, path) without searching again.
+    The cache may be shared by searches running on several worker threads.
+    """
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # 只读风险张量的摘要备忘：同一个张量对象不重复计算哈希
+        self._last_tensor = None
+        self._last_tensor_digest = None
+
+    def _tensor_digest(self, smoke_time) -> str:
+        with self._lock:
+            if smoke_time is self._last_tensor:
+                return self._last_tensor_digest
+        if isinstance(smoke_time, RiskTensor):
+            # 压缩存储直接按存储值和比例哈希，不解码
+            digest = f"{array_digest(smoke_time.data)}:{smoke_time.scale!r}"
+        else:
+            digest = array_digest(smoke_time)
+        if isinstance(smoke_time, RiskTensor) or (isinstance(smoke_time, np.ndarray) and not smoke_time.flags.writeable):
+            with self._lock:
+                self._last_tensor, self._last_tensor_digest = smoke_time, digest
+        return digest
+
+    def make_key(self, grid, smoke_time, start, algorithm, **params) -> tuple:
+        """Build the cache key; `params` are the algorithm's weights/thresholds."""
+        return (
+            algorithm,
+            array_digest(grid, dtype=np.int8),
+            self._tensor_digest(smoke_time),
+            tuple(start),
+            tuple(sorted(params.items())),
+        )
+
+    def get_or_compute(self, key, compute):
+        """Return the cached result for `key`, or call `compute()` and store it."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        # 搜索在锁外执行，其他线程的查询不会被阻塞
+        if value is None:
+            value = compute()
+            with self._lock:
+                self._entries[key] = _NO_ROUTE if value is None else value
+                self._evict()
+
+        if value is _NO_ROUTE or value is None:
+            return None
+        cost, path = value
+        return cost, list(path)
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def resize(self, max_entries):
+        """Change the capacity, evicting least recently used entries if needed."""
+        with self._lock:
+            self.max_entries = max_entries
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Hit/miss counters and current size."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+            }
@@ -0,0 +1,85 @@
+from PyQt5.QtCore import Qt, QPointF
+from PyQt5.QtGui import QPainterPath, QPen, QColor
+from PyQt5.QtWidgets import QGraphicsPathItem
+from risk_renderer import ROUTE_COLORS
+
+# 线宽和各算法路线的错位（以格子边长为单位），重叠的路线可以并排看清
+ROUTE_WIDTH = 0.3
+ROUTE_OFFSETS = (-0.15, 0.0, 0.15)
+
+
+class RouteOverlay:
+    """
+    Draws each escape route as its own QGraphicsPathItem above the risk layer.
+
+    The item shows the route prefix visible at the current time step. Moving
+    forward appends the new segments to the existing path; only moving backwards
+    rebuilds the (shorter) prefix. The risk layer underneath never contains route
+    colours, so it does not need repainting when a route changes.
+    """
+
+    def __init__(self, chessboard, count=len(ROUTE_COLORS)):
+        self.chessboard = chessboard
+        cell = chessboard.square_size
+        self.items = []
+        self._routes = [None] * count
+        self._points = [[] for _ in range(count)]
+        self._shown = [0] * count
+
+        for idx in range(count):
+            item = QGraphicsPathItem()
+            pen = QPen(QColor(*ROUTE_COLORS[idx]), ROUTE_WIDTH * cell)
+            pen.setCapStyle(Qt.RoundCap)
+            pen.setJoinStyle(Qt.RoundJoin)
+            item.setPen(pen)
+            item.setZValue(3)
+            item.setAcceptedMouseButtons(Qt.NoButton)
+            chessboard.scene.addItem(item)
+            self.items.append(item)
+
+    def _set_route(self, idx, route):
+        """Precompute the scene points of a new route and clear its item."""
+        cell = self.chessboard.square_size
+        offset = (0.5 + ROUTE_OFFSETS[idx % len(ROUTE_OFFSETS)]) * cell
+        self._routes[idx] = route
+        self._points[idx] = [QPointF(col * cell + offset, row * cell + offset) for row, col in route or []]
+        self._shown[idx] = 0
+        self.items[idx].setPath(QPainterPath())
+
+    def update(self, routes, time_step):
+        """
+        Show the prefix of every route visible at `time_step`.
+
+        :param routes: [route per algorithm], each a list of (row, col)
+        :param time_step: current time step; a route shows min(time_step + 1, len(route)) cells
+        """
+        for idx in range(len(self.items)):
+            route = routes[idx] if routes and idx < len(routes) else None
+            if route is not self._routes[idx]:
+                self._set_route(idx, route)
+
+            points = self._points[idx]
+            shown = self._shown[idx]
+            count = min(time_step + 1, len(points))
+            if count == shown:
+                continue
+
+            item = self.items[idx]
+            if count > shown and shown > 0:
+                # 向前播放：在已有路径末尾追加新线段
+                path = item.path()
+                start = shown
+            else:
+                # 回退或首次显示：重建较短的前缀
+                path = QPainterPath()
+                if count > 0:
+                    path.moveTo(points[0])
+                start = 1
+            for point in points[start:count]:
+                path.lineTo(point)
+            item.setPath(path)
+            self._shown[idx] = count
+
+    def clear(self):
+        for idx in range(len(self.items)):
+            self._set_route(idx, None)
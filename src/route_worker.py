@@ -0,0 +1,84 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from PyQt5 import QtCore
+from PyQt5.QtCore import pyqtSignal
+from time_expanded_graph import SearchCancelled
+
+
+class RouteSearchPool(QtCore.QObject):
+    """
+    Runs route searches on a background thread pool.
+
+    All searches of one request are submitted at the same time; each result is
+    delivered to the GUI thread through a signal as soon as its search finishes.
+    Every task receives the request's threading.Event, which the searches poll
+    so that cancel() stops them at their next check.
+    """
+
+    route_finished = pyqtSignal(int, str, object)   # 请求编号, 算法名, (cost, path) 或 None
+    route_failed = pyqtSignal(int, str, str)        # 请求编号, 算法名, 错误信息
+    route_cancelled = pyqtSignal(int, str)          # 请求编号, 算法名
+
+    def __init__(self, max_workers=3, parent=None):
+        super().__init__(parent)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="route-search")
+        self.request_id = 0
+        self._cancel_event = None
+        self._futures = []
+
+        # 退出程序时停止仍在运行的搜索
+        app = QtCore.QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.shutdown)
+
+    def submit(self, tasks):
+        """
+        Cancel any running request and start a new one.
+
+        :param tasks: {algorithm name: callable(cancel_event) -> (cost, path) or None}
+        :return: the new request id
+        """
+        # 先换上新请求的编号，再取消旧任务：取消排队中的任务会立即同步回调，
+        # 回调必须带着旧编号，否则会被当作新请求的结果
+        old_event, old_futures = self._cancel_event, self._futures
+        self.request_id += 1
+        self._cancel_event = threading.Event()
+        self._futures = []
+        self._cancel(old_event, old_futures)
+        for name, task in tasks.items():
+            future = self.executor.submit(task, self._cancel_event)
+            future.add_done_callback(partial(self._on_done, self.request_id, name))
+            self._futures.append(future)
+        return self.request_id
+
+    def cancel(self):
+        """Ask every search of the current request to stop."""
+        self._cancel(self._cancel_event, self._futures)
+
+    @staticmethod
+    def _cancel(cancel_event, futures):
+        if cancel_event is not None:
+            cancel_event.set()
+        for future in futures:
+            future.cancel()
+
+    def is_busy(self):
+        return any(not future.done() for future in self._futures)
+
+    def shutdown(self):
+        self.cancel()
+        self.executor.shutdown(wait=False)
+
+    def _on_done(self, request_id, name, future):
+        # 在工作线程中调用；信号以排队方式送回 GUI 线程
+        if future.cancelled():
+            self.route_cancelled.emit(request_id, name)
+            return
+        error = future.exception()
+        if isinstance(error, SearchCancelled):
+            self.route_cancelled.emit(request_id, name)
+        elif error is not None:
+            self.route_failed.emit(request_id, name, str(error))
+        else:
+            self.route_finished.emit(request_id, name, future.result())
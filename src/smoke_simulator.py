@@ -0,0 +1,121 @@
+import numpy as np
+from time_expanded_graph import WALL, EXIT
+
+DEFAULT_TIME_STEPS = 64
+
+
+class SmokeSpreadSimulator:
+    """
+    Model-free smoke spread: explicit diffusion on the open cells of a floor plan.
+
+    Every substep each fire origin is held at `source` concentration, smoke
+    diffuses to the four neighbours at `spread_rate` (walls block the flow:
+    only open neighbour pairs exchange smoke), exits vent a fraction
+    `ventilation` of their smoke outside, and all smoke decays by `decay`.
+    One output frame is `substeps` substeps, so smoke travels further per frame.
+    The output has the predictor's layout: float32 [T, H, W], 0 on walls.
+
+    The diffusion uses array shifts only, so one step costs a few vectorized
+    passes over the board however large it is.
+    """
+
+    def __init__(self, spread_rate=0.25, ventilation=0.3, decay=0.0, source=1.0, substeps=4):
+        # 显式扩散格式在 spread_rate <= 1/4 时稳定（四邻域）
+        if not 0 < spread_rate <= 0.25:
+            raise ValueError("spread_rate must be in (0, 0.25]")
+        if not 0 <= ventilation <= 1 or not 0 <= decay < 1:
+            raise ValueError("ventilation must be in [0, 1] and decay in [0, 1)")
+        self.spread_rate = spread_rate
+        self.ventilation = ventilation
+        self.decay = decay
+        self.source = source
+        self.substeps = substeps
+
+    def simulate(self, floor_plan, fire_origins, time_steps=DEFAULT_TIME_STEPS) -> np.ndarray:
+        """
+        :param floor_plan: [H, W] board states (1 = wall, 2 = exit)
+        :param fire_origins: list of (row, col) where the fire burns; cells on walls are ignored
+        :param time_steps: number of frames T; frame 0 is the state before any spread
+        :return: float32 [T, H, W] smoke concentration in [0, source]
+        """
+        return self.simulate_batch(np.asarray(floor_plan)[None], [fire_origins], time_steps)[0]
+
+    def stream(self, floor_plan, fire_origins, time_steps=DEFAULT_TIME_STEPS):
+        """Yield the frames of simulate() one by one as float32 [H, W] copies, as soon as each is computed."""
+        for frames in self._frames(np.asarray(floor_plan)[None], [fire_origins], time_steps):
+            yield frames[0].copy()
+
+    def simulate_batch(self, floor_plans, fire_origins, time_steps=DEFAULT_TIME_STEPS,
+                       batch_size=64, out=None) -> np.ndarray:
+        """
+        Simulate N scenarios together, `batch_size` boards per vectorized pass.
+
+        :param floor_plans: [N, H, W] board states, or one [H, W] plan shared by all scenarios
+        :param fire_origins: per scenario, a list of (row, col)
+        :param out: optional preallocated float32 [N, T, H, W] array to fill
+        :return: float32 [N, T, H, W]
+        """
+        plans = np.asarray(floor_plans)
+        count = len(fire_origins)
+        if plans.ndim == 2:
+            plans = np.broadcast_to(plans, (count,) + plans.shape)
+        if len(plans) != count:
+            raise ValueError("floor_plans and fire_origins must describe the same number of scenarios")
+        height, width = plans.shape[1:]
+        if out is None:
+            out = np.empty((count, time_steps, height, width), dtype=np.float32)
+        for start in range(0, count, batch_size):
+            stop = min(start + batch_size, count)
+            self._simulate_block(plans[start:stop], fire_origins[start:stop], out[start:stop])
+        return out
+
+    def _simulate_block(self, plans, fire_origins, risk):
+        """Fill risk [n, T, H, W] for n plans [n, H, W] in one set of array passes."""
+        for t, frames in enumerate(self._frames(plans, fire_origins, risk.shape[1])):
+            risk[:, t] = frames
+        return risk
+
+    def _frames(self, plans, fire_origins, time_steps):
+        """Yield the [n, H, W] smoke of every frame; the yielded array is reused, copy it to keep it."""
+        count, height, width = plans.shape
+        open_cells = (plans != WALL).astype(np.float32)
+        exits = plans == EXIT
+
+        # 每个格子与多少个非墙邻居交换烟雾
+        padded_open = np.pad(open_cells, ((0, 0), (1, 1), (1, 1)))
+        neighbours = (padded_open[:, :-2, 1:-1] + padded_open[:, 2:, 1:-1] +
+                      padded_open[:, 1:-1, :-2] + padded_open[:, 1:-1, 2:]) * open_cells
+
+        # 所有场景的火源展开为 (场景, 行, 列) 下标，越界或在墙上的忽略
+        index = [(n, row, col) for n, origins in enumerate(fire_origins)
+                 for row, col in np.asarray(origins, dtype=np.intp).reshape(-1, 2)]
+        index = np.asarray(index, dtype=np.intp).reshape(-1, 3)
+        scenario, rows, cols = index[:, 0], index[:, 1], index[:, 2]
+        inside = (rows >= 0) & (rows < height) & (cols >= 0) & (cols < width)
+        scenario, rows, cols = scenario[inside], rows[inside], cols[inside]
+        burning = open_cells[scenario, rows, cols] > 0
+        scenario, rows, cols = scenario[burning], rows[burning], cols[burning]
+
+        # 每个子步之后的保留比例：墙体 0，出口按通风比例排烟，其余按衰减
+        retain = open_cells * np.where(exits, 1 - self.ventilation, 1).astype(np.float32)
+        retain *= np.float32(1 - self.decay)
+        rate = np.float32(self.spread_rate)
+
+        smoke = np.zeros((count, height + 2, width + 2), dtype=np.float32)  # 外圈一格 0 作为边界
+        inner = smoke[:, 1:-1, 1:-1]
+        flow = np.empty_like(inner)
+        for t in range(time_steps):
+            inner[scenario, rows, cols] = self.source
+            yield inner
+            if t == time_steps - 1:
+                break
+            for _ in range(self.substeps):
+                # 墙体处烟雾恒为 0，邻居之和只统计非墙邻居
+                np.add(smoke[:, :-2, 1:-1], smoke[:, 2:, 1:-1], out=flow)
+                flow += smoke[:, 1:-1, :-2]
+                flow += smoke[:, 1:-1, 2:]
+                flow -= neighbours * inner
+                flow *= rate
+                inner += flow
+                inner *= retain
+                inner[scenario, rows, cols] = self.source
@@ -0,0 +1,87 @@
+"""
+Simulation screen state across screen switches while risk frames are still
+streaming in.
+
+Run with `python -m pytest -q` from src/ (uses the offscreen Qt platform).
+"""
+import os
+import threading
+import time
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import pytest
+from PyQt5.QtWidgets import QApplication, QMainWindow, QMessageBox
+from interface_manager import InterfaceManager
+from predictor_service import PredictorService
+from smoke_simulator import DEFAULT_TIME_STEPS
+
+
+def process_events_until(app, condition, timeout=20):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        assert time.perf_counter() < deadline, "timed out waiting for the UI"
+        app.processEvents()
+        time.sleep(0.002)
+
+
+@pytest.fixture
+def simulation(monkeypatch):
+    app = QApplication.instance() or QApplication([])
+    for name in ('information', 'warning', 'critical'):
+        monkeypatch.setattr(QMessageBox, name, staticmethod(lambda *args, **kwargs: None))
+    window = QMainWindow()
+    manager = InterfaceManager(window)
+    manager.show_fire_simulation_ui()
+    service = manager.predictor_service
+    process_events_until(app, lambda: service.status != PredictorService.LOADING)
+    # 不使用模型和磁盘缓存：风险来自烟雾扩散模拟
+    monkeypatch.setattr(service, 'start', lambda: None)
+    monkeypatch.setattr(service, 'lookup', lambda floor_plan: None)
+    service.status = PredictorService.FAILED
+    screen = manager.interfaces['fire_simulation']
+    screen.chessboard.set_cell_state(0, 0, 2)
+    screen._set_start_point(5, 5)
+    yield app, manager, screen
+    screen.risk_stream.cancel()
+    screen.playback.stop()
+
+
+def test_back_during_stream_keeps_frames_that_arrive_later(simulation, monkeypatch):
+    app, manager, screen = simulation
+
+    # 先放出 3 帧，其余的帧等离开界面后再放出
+    release = threading.Event()
+    stream = screen.smoke_simulator.stream
+
+    def gated_stream(*args, **kwargs):
+        for t, frame in enumerate(stream(*args, **kwargs)):
+            if t == 3:
+                release.wait(20)
+            yield frame
+
+    monkeypatch.setattr(screen.smoke_simulator, 'stream', gated_stream)
+    screen.on_calc_risk_clicked()
+    process_events_until(app, lambda: screen.max_time_steps == 3)
+
+    screen.on_back_clicked()
+    release.set()
+    process_events_until(app, lambda: not screen.risk_stream.is_running()
+                         and screen.max_time_steps == DEFAULT_TIME_STEPS)
+
+    manager.show_fire_simulation_ui()
+    assert screen.max_time_steps == DEFAULT_TIME_STEPS
+    assert len(screen.risk_data) == DEFAULT_TIME_STEPS
+    assert screen.time_slider.maximum() == DEFAULT_TIME_STEPS - 1
+    assert len(screen.frame_renderer.risk) == DEFAULT_TIME_STEPS
+
+
+def test_back_restores_snapshot_of_finished_stream(simulation):
+    app, manager, screen = simulation
+    screen.on_calc_risk_clicked()
+    process_events_until(app, lambda: screen.max_time_steps == DEFAULT_TIME_STEPS)
+    screen.time_slider.setValue(10)
+
+    screen.on_back_clicked()
+    manager.show_fire_simulation_ui()
+    assert screen.max_time_steps == DEFAULT_TIME_STEPS
+    assert screen.current_time_step == 10
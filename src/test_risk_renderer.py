@@ -0,0 +1,38 @@
+"""
+Colour conversion of risk frames: the LUT path must agree with the direct
+per-frame conversion and survive bad model output (NaN risk values).
+
+Run with `python -m pytest -q` from src/.
+"""
+import warnings
+import numpy as np
+from risk_renderer import build_risk_lut, risk_frame_to_rgb, risk_frames_to_rgb, SAFE_COLOR, STATE_COLORS
+
+
+def test_lut_matches_direct_conversion():
+    rng = np.random.default_rng(11)
+    risk = rng.uniform(-0.2, 1.1, size=(4, 9, 7)).astype(np.float32)
+    state = rng.choice([0, 1, 2, 3], size=(9, 7), p=[0.7, 0.1, 0.1, 0.1])
+    rgb = risk_frames_to_rgb(risk, state, build_risk_lut())
+    for t in range(len(risk)):
+        # LUT 量化误差不超过一个颜色级
+        diff = np.abs(rgb[t].astype(int) - risk_frame_to_rgb(risk[t], state).astype(int))
+        assert diff.max() <= 1
+
+
+def test_nan_risk_is_drawn_as_safe():
+    risk = np.full((2, 3, 3), 0.5, dtype=np.float32)
+    risk[0, 1, 1] = np.nan
+    risk[1, 0, 2] = np.nan
+    state = np.zeros((3, 3), dtype=int)
+    state[2, 2] = 1
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        rgb = risk_frames_to_rgb(risk, state, build_risk_lut())
+        direct = risk_frame_to_rgb(risk[0], state)
+    assert tuple(rgb[0, 1, 1]) == SAFE_COLOR
+    assert tuple(rgb[1, 0, 2]) == SAFE_COLOR
+    assert tuple(direct[1, 1]) == SAFE_COLOR
+    # 其余格子与墙体颜色不受影响
+    assert tuple(rgb[0, 0, 0]) == tuple(risk_frame_to_rgb(np.full((3, 3), 0.5), state)[0, 0])
+    assert tuple(rgb[0, 2, 2]) == STATE_COLORS[1]
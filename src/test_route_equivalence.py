@@ -0,0 +1,125 @@
+"""
+Randomised equivalence checks: the vectorized solvers (layered DP, backward
+escape field, incremental planner) must find routes as cheap as the heap
+solvers (UCS / A*) on the same time-expanded graph.
+
+Run with `python -m pytest -q` from src/.
+"""
+from functools import partial
+import numpy as np
+import pytest
+from UCS import uniform_cost_search_dynamic, layered_dp_search_dynamic
+from A_star import a_star_search_dynamic
+from escape_field import EscapeField, IncrementalEscapePlanner
+from risk_tensor import RiskTensor
+from time_expanded_graph import DIRECTIONS, WALL, EXIT
+
+A_STAR_WEIGHTS = dict(w1=0.6, w2=0.3, w3=0.1, danger_threshold=0.4)
+UCS_WEIGHTS = dict(w1=1.0, w2=0.0, w3=0.0, danger_threshold=0.4)
+
+# (堆式求解器, 与其默认代价模型相同的权重)
+COST_MODELS = [
+    pytest.param(uniform_cost_search_dynamic, UCS_WEIGHTS, id='ucs'),
+    pytest.param(partial(a_star_search_dynamic, **A_STAR_WEIGHTS), A_STAR_WEIGHTS, id='a_star'),
+]
+
+# 逃生表与正向搜索的求和顺序不同，只允许浮点舍入误差
+FIELD_TOLERANCE = 1e-9
+
+
+def random_scenario(rng, max_size=8, max_steps=12):
+    """Small random board (walls, exits) with float32 smoke [T, H, W]."""
+    rows, cols, steps = rng.integers(1, max_size + 1, size=3)
+    steps = min(steps, max_steps)
+    grid = np.where(rng.random((rows, cols)) < 0.25, WALL, 0)
+    grid[rng.random((rows, cols)) < 0.08] = EXIT
+    smoke = rng.random((steps, rows, cols)).astype(np.float32)
+    return grid, smoke
+
+
+def open_cells(grid):
+    return [tuple(cell) for cell in np.argwhere(grid != WALL)]
+
+
+def path_cost(grid, smoke, path, w1, w2, w3, danger_threshold):
+    """Check that `path` is a legal escape route and return its cost."""
+    moves = set(DIRECTIONS)
+    for (t0, r0, c0), (t1, r1, c1) in zip(path, path[1:]):
+        assert t1 == t0 + 1 and (r1 - r0, c1 - c0) in moves
+        assert grid[r1, c1] != WALL
+    assert grid[path[-1][1], path[-1][2]] == EXIT
+
+    def cell_cost(t, r, c):
+        value = float(smoke[t, r, c])
+        return w1 * value + (w3 if value >= danger_threshold else 0)
+
+    return cell_cost(*path[0]) + sum(cell_cost(*state) + w2 for state in path[1:])
+
+
+def assert_same_cost(result, expected, grid, smoke, weights, tolerance):
+    assert (result is None) == (expected is None)
+    if result is not None:
+        cost, path = result
+        assert cost == pytest.approx(expected[0], rel=tolerance, abs=tolerance)
+        assert cost == pytest.approx(path_cost(grid, smoke, path, **weights), rel=1e-9, abs=1e-9)
+
+
+@pytest.mark.parametrize('search, weights', COST_MODELS)
+def test_layered_dp_matches_heap_search(search, weights):
+    rng = np.random.default_rng(5)
+    for _ in range(150):
+        grid, smoke = random_scenario(rng)
+        for start in open_cells(grid):
+            expected = search(grid, smoke, start)
+            result = layered_dp_search_dynamic(grid, smoke, start, **weights)
+            assert_same_cost(result, expected, grid, smoke, weights, 1e-9)
+
+
+@pytest.mark.parametrize('search, weights', COST_MODELS)
+def test_escape_field_matches_heap_search(search, weights):
+    rng = np.random.default_rng(6)
+    for _ in range(150):
+        grid, smoke = random_scenario(rng)
+        field = EscapeField(grid, smoke, **weights)
+        for start in open_cells(grid):
+            # 在 t0 出发等价于在 smoke[t0:] 上从 0 时刻搜索
+            departure = int(rng.integers(0, len(smoke)))
+            expected = search(grid, smoke[departure:], start)
+            result = field.route(start, departure)
+            if result is not None:
+                result = result[0], [(t - departure, r, c) for t, r, c in result[1]]
+            assert_same_cost(result, expected, grid, smoke[departure:], weights, FIELD_TOLERANCE)
+
+
+@pytest.mark.parametrize('search, weights', COST_MODELS)
+def test_incremental_planner_matches_heap_search(search, weights):
+    rng = np.random.default_rng(7)
+    for _ in range(100):
+        grid, smoke = random_scenario(rng)
+        cells = open_cells(grid)
+        if not cells:
+            continue
+        planner = IncrementalEscapePlanner(**weights)
+        for query in range(6):
+            # 修改单个格子或替换后面的若干帧，交替传入可写数组和只读的 RiskTensor
+            smoke = smoke.copy()
+            t = int(rng.integers(0, len(smoke)))
+            if rng.random() < 0.5:
+                smoke[t, rng.integers(0, grid.shape[0]), rng.integers(0, grid.shape[1])] = rng.random()
+            else:
+                smoke[t:] = rng.random(smoke[t:].shape)
+            risk = RiskTensor(smoke) if query % 2 else smoke
+            start = cells[rng.integers(len(cells))]
+            expected = search(grid, smoke, start)
+            result = planner.plan(grid, risk, start)
+            assert_same_cost(result, expected, grid, smoke, weights, FIELD_TOLERANCE)
+
+
+def test_escape_field_rejects_invalid_starts():
+    grid = np.zeros((3, 3), dtype=int)
+    grid[1, 1] = WALL
+    grid[0, 0] = EXIT
+    field = EscapeField(grid, np.full((6, 3, 3), 0.5, dtype=np.float32))
+    for start in [(1, 1), (-1, 0), (0, -1), (3, 0), (0, 3)]:
+        assert field.route(start) is None
+    assert field.route((2, 2)) is not None
@@ -0,0 +1,262 @@
+import numpy as np
+from collections import deque
+from functools import cached_property
+from typing import List, Tuple, Optional
+from risk_tensor import RiskTensor
+
+# 4邻域 + 等待，顺序与各搜索算法原有的 directions 保持一致
+DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1), (0, 0)]
+
+WALL = 1
+EXIT = 2
+
+
+class SearchCancelled(Exception):
+    """Raised inside a search when its cancel_event is set."""
+
+
+def check_cancelled(cancel_event) -> None:
+    """Raise SearchCancelled if the optional threading.Event has been set."""
+    if cancel_event is not None and cancel_event.is_set():
+        raise SearchCancelled()
+
+
+def as_smoke_tensor(smoke_time) -> np.ndarray:
+    """
+    Return a read-only [T, R, C] float view of `smoke_time`.
+
+    Floating-point ndarrays (e.g. the float32 predictor output) are used as-is
+    without copying; nested lists and integer arrays are converted once.
+    """
+    if isinstance(smoke_time, np.ndarray) and np.issubdtype(smoke_time.dtype, np.floating):
+        smoke = np.ascontiguousarray(smoke_time)
+    else:
+        smoke = np.asarray(smoke_time, dtype=np.float64)
+    smoke = smoke.view()
+    smoke.flags.writeable = False
+    return smoke
+
+
+def smoke_storage(smoke_time) -> Tuple[np.ndarray, float]:
+    """
+    Return the read-only [T, R, C] stored smoke values and the factor that turns
+    them into concentrations. A RiskTensor is read in its own storage type
+    (float16 / uint8 are not decoded); anything else goes through as_smoke_tensor.
+    """
+    if isinstance(smoke_time, RiskTensor):
+        return smoke_time.data, smoke_time.scale
+    return as_smoke_tensor(smoke_time), 1.0
+
+
+class ScaledSmoke:
+    """Flat quantized smoke read as concentrations: smoke[i] == data[i] * scale."""
+
+    __slots__ = ('data', 'scale')
+
+    def __init__(self, data, scale):
+        self.data = data
+        self.scale = scale
+
+    def __getitem__(self, index):
+        return float(self.data[index]) * self.scale
+
+    def __len__(self):
+        return len(self.data)
+
+
+class TimeExpandedGraph:
+    """
+    Compact time-expanded graph shared by UCS, BFS and A*.
+
+    A state (t, r, c) is encoded as the flat integer t * rows * cols + r * cols + c,
+    so every per-state table (cost, parent, closed flags) is a preallocated
+    NumPy array of length T * rows * cols instead of a dict keyed by tuples.
+
+    :param grid: static grid (0=free, 1=wall, 2=exit, 3=start)
+    :param smoke_time: smoke concentrations over time [T][R][C], ndarray, RiskTensor or nested lists
+    """
+
+    def __init__(self, grid, smoke_time):
+        self.grid = np.asarray(grid, dtype=np.int8)
+        if self.grid.ndim != 2 or self.grid.size == 0:
+            raise ValueError("grid must be a non-empty 2D map")
+
+        # smoke 为存储值（RiskTensor 的 float16 / uint8 不解码），乘以 smoke_scale 得到浓度
+        self.smoke, self.smoke_scale = smoke_storage(smoke_time)
+        if self.smoke.ndim != 3 or self.smoke.shape[1:] != self.grid.shape:
+            raise ValueError(
+                f"smoke_time shape {self.smoke.shape} does not match grid {self.grid.shape}"
+            )
+
+        self.T = self.smoke.shape[0]
+        self.rows, self.cols = self.grid.shape
+        self.layer_size = self.rows * self.cols
+        self.num_states = self.T * self.layer_size
+        # 状态数不超过 int32 范围时用 int32 存父指针，内存减半
+        self.state_dtype = np.int32 if self.num_states < 2 ** 31 else np.int64
+
+        # 扁平化的静态掩码与烟雾数据
+        self.wall_mask = (self.grid == WALL).ravel()
+        self.exit_mask = (self.grid == EXIT).ravel()
+        self.smoke_flat = self.smoke.reshape(-1)
+        if self.smoke_scale != 1.0:
+            self.smoke_flat = ScaledSmoke(self.smoke_flat, self.smoke_scale)
+
+    @cached_property
+    def neighbor_table(self) -> np.ndarray:
+        return self._build_neighbor_table()
+
+    @cached_property
+    def neighbors(self) -> List[List[int]]:
+        """
+        Per-cell Python neighbour lists (out-of-grid and wall cells removed) for
+        the heap solvers' hot loops. Built on first use: the vectorized solvers
+        never read it, and at large sizes it costs far more than their sweeps.
+        """
+        return [[int(n) for n in row if n >= 0] for row in self.neighbor_table]
+
+    def _build_neighbor_table(self) -> np.ndarray:
+        """Build a [rows*cols, 5] table of neighbour cell indices, -1 where blocked."""
+        r, c = np.divmod(np.arange(self.layer_size), self.cols)
+        table = np.full((self.layer_size, len(DIRECTIONS)), -1, dtype=np.int64)
+        for k, (dr, dc) in enumerate(DIRECTIONS):
+            nr, nc = r + dr, c + dc
+            valid = (nr >= 0) & (nr < self.rows) & (nc >= 0) & (nc < self.cols)
+            idx = np.where(valid, nr * self.cols + nc, 0)
+            valid &= ~self.wall_mask[idx]
+            table[:, k] = np.where(valid, idx, -1)
+        return table
+
+    @property
+    def has_exit(self) -> bool:
+        return bool(self.exit_mask.any())
+
+    @property
+    def exit_distances(self) -> np.ndarray:
+        """Flat wall-aware step distance from every cell to the nearest exit (inf if unreachable)."""
+        return exit_distance_field(self.grid, self.neighbors)
+
+    def step_cost_layer(self, t: int, w1: float = 1.0, w2: float = 0.0, w3: float = 0.0,
+                        danger_threshold: float = 0.4, window=None) -> np.ndarray:
+        """
+        [rows, cols] float64 cost of entering each cell at layer t:
+        w1 * smoke + w2 + (w3 if smoke >= danger_threshold).
+        The default weights give the UCS cost model (step cost = smoke).
+        `window` optionally restricts the result to a (row_slice, col_slice) sub-grid.
+        """
+        smoke = self.smoke_layer(t, window)
+        cost = w1 * smoke + w2
+        if w3:
+            cost += np.where(smoke >= danger_threshold, w3, 0.0)
+        return cost
+
+    def start_cost(self, t: int, r: int, c: int, w1: float = 1.0, w3: float = 0.0,
+                   danger_threshold: float = 0.4) -> float:
+        """Cost of standing on the start cell at departure time t (no per-step w2)."""
+        smoke = self.smoke_at(t, r, c)
+        return w1 * smoke + (w3 if smoke >= danger_threshold else 0)
+
+    def smoke_layer(self, t: int, window=None) -> np.ndarray:
+        """[rows, cols] float64 smoke concentrations of layer t (optionally a (row_slice, col_slice) window)."""
+        layer = self.smoke[t] if window is None else self.smoke[t][window]
+        smoke = layer.astype(np.float64)
+        if self.smoke_scale != 1.0:
+            smoke *= self.smoke_scale
+        return smoke
+
+    def smoke_at(self, t: int, r: int, c: int) -> float:
+        return float(self.smoke[t, r, c]) * self.smoke_scale
+
+    def encode(self, t: int, r: int, c: int) -> int:
+        return t * self.layer_size + r * self.cols + c
+
+    def decode(self, state: int) -> Tuple[int, int, int]:
+        t, cell = divmod(int(state), self.layer_size)
+        r, c = divmod(cell, self.cols)
+        return t, r, c
+
+    def cost_array(self) -> np.ndarray:
+        """Per-state best-cost table initialised to +inf."""
+        return np.full(self.num_states, np.inf, dtype=np.float64)
+
+    def parent_array(self) -> np.ndarray:
+        """Per-state parent pointer table initialised to -1 (no parent)."""
+        return np.full(self.num_states, -1, dtype=self.state_dtype)
+
+    def flag_array(self) -> np.ndarray:
+        """Per-state boolean table (closed / visited flags)."""
+        return np.zeros(self.num_states, dtype=np.bool_)
+
+    def reconstruct_path(self, parent: np.ndarray, state: int) -> List[Tuple[int, int, int]]:
+        """Follow parent pointers back from `state` and return [(t, r, c), ...]."""
+        path = []
+        while state >= 0:
+            path.append(self.decode(state))
+            state = int(parent[state])
+        path.reverse()
+        return path
+
+
+def gather_neighbors(values: np.ndarray, out: np.ndarray, sign: int = 1) -> np.ndarray:
+    """
+    Fill out[k, r, c] = values[r + sign * dr_k, c + sign * dc_k] for every (dr_k, dc_k)
+    in DIRECTIONS, with +inf outside the grid.
+
+    sign=1 gathers the successors of each cell, sign=-1 its predecessors.
+    """
+    rows, cols = values.shape
+    out.fill(np.inf)
+    for k, (dr, dc) in enumerate(DIRECTIONS):
+        dr, dc = sign * dr, sign * dc
+        dst_r = slice(max(-dr, 0), rows + min(-dr, 0))
+        dst_c = slice(max(-dc, 0), cols + min(-dc, 0))
+        src_r = slice(max(dr, 0), rows + min(dr, 0))
+        src_c = slice(max(dc, 0), cols + min(dc, 0))
+        out[k, dst_r, dst_c] = values[src_r, src_c]
+    return out
+
+
+# 单条目缓存：地图不变时复用距离场，地图变化时重新计算。
+# (key, field) 作为一个元组整体替换，并发的搜索线程不会读到新键配旧距离场
+_distance_field_cache = (None, None)
+
+
+def exit_distance_field(grid: np.ndarray, neighbors: List[List[int]]) -> np.ndarray:
+    """
+    Multi-source BFS from all exits over the static grid, respecting walls.
+
+    Returns a read-only flat array of step distances to the nearest exit, inf for
+    cells that cannot reach any exit. The result is cached until the floor plan changes.
+    """
+    global _distance_field_cache
+    key = (grid.shape, grid.tobytes())
+    cached_key, cached_field = _distance_field_cache
+    if cached_key == key:
+        return cached_field
+
+    dist = np.full(grid.size, np.inf, dtype=np.float64)
+    exits = np.flatnonzero(grid.ravel() == EXIT)
+    dist[exits] = 0
+    queue = deque(int(cell) for cell in exits)
+    while queue:
+        cell = queue.popleft()
+        next_dist = dist[cell] + 1
+        for ncell in neighbors[cell]:
+            if next_dist < dist[ncell]:
+                dist[ncell] = next_dist
+                queue.append(ncell)
+
+    dist.flags.writeable = False
+    _distance_field_cache = (key, dist)
+    return dist
+
+
+def build_graph(grid, smoke_time, start: Tuple[int, int]) -> Optional[TimeExpandedGraph]:
+    """Build the shared graph, or None when the horizon is empty."""
+    graph = TimeExpandedGraph(grid, smoke_time)
+    sr, sc = start
+    if not (0 <= sr < graph.rows and 0 <= sc < graph.cols):
+        raise ValueError(f"start {start} is outside the grid")
+    if graph.T == 0:
+        return None
+    return graph